@@ -1,27 +1,47 @@
 # app.py (with dynamic impact stories for all roles)
 import streamlit as st
 from pathlib import Path
-import pandas as pd
-import json
+import os
 import base64
 import time
 
-# visualization imports
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-
+# pandas (and wordcloud, in visuals.py) are imported where they are used, so a
+# cold start only pays for them once a result is actually shown
 # import robust helpers from skill_extractor.py (must be in same folder)
 from skill_extractor import (
-    load_job_skills,
-    build_skill_vocabulary,
-    extract_skills_from_file,
+    get_catalog,
+    extract_resume_report,
     extract_skills_from_text,
     compare_to_role,
+    submit_gaps_for_all_roles,
+    best_fit_roles,
     generate_microplans
 )
+from instrumentation import METRICS, start_trace, finish_trace
+from cohort import get_cohort_store
+from resume_cache import content_key, get_resume_cache
+from visuals import get_wordcloud_renderer
+from pdf_sandbox import get_pdf_sandbox
+
+# PDF sandbox workers are spawned processes, and spawned processes re-run the main
+# module first; here that is this whole script. A "__main__" spec makes
+# multiprocessing skip that (as it does for `python -m` entry points).
+if __spec__ is None:
+    import importlib.machinery
+    __spec__ = importlib.machinery.ModuleSpec("__main__", None)
 
 st.set_page_config(page_title="SkillBridge — Job Skill Gap Finder", layout="wide")
 
+# opt-in per-stage timings for this rerun (shown in the Diagnostics expander at the bottom)
+show_diagnostics = st.sidebar.checkbox("Diagnostics", value=bool(os.environ.get("SKILLBRIDGE_DIAGNOSTICS")),
+                                       help="Time each stage of this run and show the timings below.")
+trace = start_trace("streamlit_rerun") if show_diagnostics else None
+
+# every analysis is recorded for the cohort view; the label groups a class or applicant pool
+cohort_label = st.sidebar.text_input("Cohort label", key="cohort_label",
+                                     help="Optional: tag your analyses, e.g. a training batch.")
+show_cohort = st.sidebar.checkbox("Cohort view", help="Aggregate skill gaps across all recorded analyses.")
+
 # ----- CSS / visual polish -----
 st.markdown(
     """
@@ -74,11 +94,11 @@ Full Stack Developer,"HTML,CSS,JavaScript,React,Node.js,Express,MongoDB,REST API
     Path("job_skills.csv").write_text(default_csv, encoding="utf-8")
     st.success("Created default job_skills.csv for instant demo.")
 
-# Load roles and vocabulary
+# Load roles and the skill matcher (shared catalog, re-parsed only when the files change)
 try:
-    job_df = load_job_skills("job_skills.csv")
-    roles = job_df['role'].tolist()
-    vocab = build_skill_vocabulary("job_skills.csv", "resources.json")
+    catalog = get_catalog("job_skills.csv", "resources.json", "aliases.json")
+    roles = catalog.roles
+    matcher = catalog.matcher
 except Exception as e:
     st.error(f"Error loading skills data: {e}")
     st.stop()
@@ -194,6 +214,22 @@ if 'res' not in st.session_state:
     st.session_state.res = None
 if 'extracted_skills' not in st.session_state:
     st.session_state.extracted_skills = None
+# per input (content hash): skills, best-fit roles and the gaps for every role
+if 'analyses' not in st.session_state:
+    st.session_state.analyses = {}
+MAX_SESSION_ANALYSES = 8
+
+def role_gap(entry, role):
+    """Gap analysis for ``role`` from the precomputed table; computed directly
+    while the table is still being built or if the catalog has changed."""
+    fut = entry["gaps"]
+    if entry["catalog_version"] == catalog.version and fut.done() and fut.exception() is None:
+        res = fut.result().get(role.lower())
+        if res is not None:
+            return res
+    return compare_to_role(entry["skills"], role, "job_skills.csv", catalog=catalog)
+
+wordcloud_future = None
 
 # Layout: left column = inputs, right column = results + pitch
 col1, col2 = st.columns([1, 1.2])
@@ -226,25 +262,62 @@ with col1:
         with st.spinner("Extracting skills..."):
             user_skills = []
             if uploaded:
-                tmpdir = Path("tmp_demo_uploads")
-                tmpdir.mkdir(exist_ok=True)
-                fp = tmpdir / uploaded.name
-                with open(fp, "wb") as f:
-                    f.write(uploaded.getbuffer())
-                user_skills = extract_skills_from_file(str(fp), vocab)
+                input_key = content_key(uploaded.getvalue(), matcher.version)
+            elif manual:
+                input_key = content_key(manual.encode("utf-8"), matcher.version, "text")
+            else:
+                input_key = None
+            entry = st.session_state.analyses.get(input_key)
+            if entry is not None:
+                # same input analyzed earlier in this session: nothing to redo
+                user_skills = entry["skills"]
+            elif uploaded:
+                # parsed straight from the upload buffer, in a sandboxed worker
+                # with time/memory/page limits; the resume cache skips the parse
+                # when the same bytes were analyzed before
+                report = extract_resume_report(uploaded, matcher, filename=uploaded.name, sandbox=get_pdf_sandbox())
+                user_skills = report["skills"]
+                if report["timed_out"]:
+                    st.warning(f"Reading the PDF took too long; results cover the first {report['pages']} page(s).")
+                elif report["error"]:
+                    st.warning(f"Part of the file could not be read ({report['error']}).")
+                elif report["truncated"]:
+                    st.info(f"Only the first {report['pages']} of {report['total_pages']} pages were analyzed.")
             elif manual:
                 if "," in manual:
                     user_skills = [s.strip() for s in manual.split(",") if s.strip()]
                 else:
-                    user_skills = extract_skills_from_text(manual, vocab)
-            
+                    user_skills = extract_skills_from_text(manual, matcher)
+
+            if user_skills and entry is None:
+                # gaps for every role are filled in on a background thread, so
+                # switching the target role later needs no recomputation
+                entry = {"skills": user_skills, "catalog_version": catalog.version,
+                         "gaps": submit_gaps_for_all_roles(user_skills, catalog=catalog),
+                         "best_fit": best_fit_roles(user_skills, k=3, catalog=catalog),
+                         "recorded": set()}
+                analyses = st.session_state.analyses
+                analyses[input_key] = entry
+                while len(analyses) > MAX_SESSION_ANALYSES:
+                    analyses.pop(next(iter(analyses)))
+
             if user_skills:
-                res = compare_to_role(user_skills, st.session_state.role_choice, "job_skills.csv")
+                res = role_gap(entry, st.session_state.role_choice)
                 if "error" not in res:
                     st.session_state.analysis_done = True
+                    st.session_state.input_key = input_key
                     st.session_state.res = res
                     st.session_state.user_skills = user_skills
                     st.session_state.extracted_skills = user_skills[:]
+                    # recorded once per input, role and cohort label: clicking Analyze
+                    # again on the same input must not count it twice
+                    recorded = (st.session_state.role_choice, cohort_label.strip() or None)
+                    if recorded not in entry["recorded"]:
+                        try:
+                            get_cohort_store().add(recorded[0], res, cohort=recorded[1])
+                            entry["recorded"].add(recorded)
+                        except OSError as e:
+                            st.warning(f"Could not record this analysis for the cohort view: {e}")
                 else:
                     st.session_state.analysis_done = False
                     st.error(res["error"])
@@ -267,10 +340,16 @@ with col2:
         st.write(story_text)
 
     # All results are now displayed based on the session state
-    if st.session_state.get('analysis_done', False):
-        res = st.session_state.res
+    entry = st.session_state.analyses.get(st.session_state.get('input_key'))
+    if st.session_state.get('analysis_done', False) and entry is not None:
+        import pandas as pd
         extracted_skills = st.session_state.extracted_skills
         role_choice = st.session_state.role_choice
+        # follows the role selector without re-analyzing
+        res = st.session_state.res = role_gap(entry, role_choice)
+        if "error" in res:
+            st.error(res["error"])
+            st.stop()
         
         st.markdown("**Detected / Provided skills**")
         st.write(st.session_state.user_skills)
@@ -280,12 +359,7 @@ with col2:
         st.write("**Matched:**", res['matched'] if res['matched'] else "None")
         st.write("**Missing (prioritized):**")
         
-        rmap = {}
-        try:
-            with open("resources.json", "r", encoding="utf-8") as rf:
-                rmap = json.load(rf)
-        except Exception:
-            pass
+        rmap = catalog.resources
 
         for s in res['missing']:
             st.markdown(f"- **{s}**")
@@ -296,6 +370,11 @@ with col2:
             else:
                 st.markdown("  - Suggested: Coursera / YouTube / Kaggle Learn")
 
+        # every role scored at once against the detected skills
+        st.markdown("### Best-fit roles")
+        for fit in entry["best_fit"]:
+            st.write(f"**{fit['role']}** — {fit['coverage']:.0%} covered, {len(fit['missing'])} skills to learn")
+
         # summary visualization
         st.markdown("### Visual summary")
         df_counts = pd.DataFrame.from_dict({"Matched": [len(res['matched'])], "Missing": [len(res['missing'])]}, orient="index", columns=["count"])
@@ -335,15 +414,11 @@ with col2:
         st.markdown("---")
         st.subheader("Skills Visualized")
         if extracted_skills:
-            try:
-                wc_text = " ".join(extracted_skills)
-                wordcloud = WordCloud(width=800, height=400, background_color='white').generate(wc_text)
-                fig, ax = plt.subplots(figsize=(10, 5))
-                ax.imshow(wordcloud, interpolation='bilinear')
-                ax.axis("off")
-                st.pyplot(fig)
-            except Exception as e:
-                st.error(f"WordCloud generation failed: {e}")
+            # rendered (or taken from the cache) on a background thread so the
+            # rest of the page isn't held up; filled in at the end of the script
+            wordcloud_slot = st.empty()
+            wordcloud_slot.info("Rendering word cloud…")
+            wordcloud_future = get_wordcloud_renderer().submit(extracted_skills, 800, 400)
         else:
             st.info("No skills to visualize yet.")
     
@@ -367,4 +442,75 @@ st.markdown(
 
 # Footer: quick demo tips
 st.markdown("")
-st.markdown("**Quick demo tips:** Upload a resume or pick a demo → Choose a target role → Click **Analyze skills & generate plan** → Generate microplans → Download CSV.")
\ No newline at end of file
+st.markdown("**Quick demo tips:** Upload a resume or pick a demo → Choose a target role → Click **Analyze skills & generate plan** → Switch roles to compare instantly → Generate microplans → Download CSV.")
+
+# ----- word cloud from the background renderer -----
+if wordcloud_future is not None:
+    try:
+        wordcloud_slot.image(wordcloud_future.result(timeout=60), use_container_width=True)
+    except Exception as e:
+        wordcloud_slot.error(f"WordCloud generation failed: {e}")
+
+# ----- cohort view (opt-in) -----
+if show_cohort:
+    import pandas as pd
+    store = get_cohort_store()
+    store.refresh()  # pick up analyses recorded by other processes
+    st.markdown("---")
+    st.subheader("Cohort analytics")
+    if not store.count():
+        st.info("No analyses recorded yet.")
+    else:
+        f1, f2, f3 = st.columns(3)
+        cohort_pick = f1.selectbox("Cohort", ["All cohorts"] + store.cohorts(), key="cohort_pick")
+        cohort_sel = None if cohort_pick == "All cohorts" else cohort_pick
+        role_pick = f2.selectbox("Role", ["All roles"] + store.roles(cohort_sel), key="cohort_role")
+        role_sel = None if role_pick == "All roles" else role_pick
+        period = f3.radio("Trend by", ["day", "week"], horizontal=True, key="cohort_period")
+
+        pct = store.coverage_percentiles(role_sel, cohort=cohort_sel)
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Analyses", f"{store.count(role_sel, cohort_sel):,}")
+        m2.metric("Median coverage", f"{pct[50]:.0%}")
+        m3.metric("25th percentile coverage", f"{pct[25]:.0%}")
+
+        st.markdown("**Most frequently missing skills**")
+        top = store.top_missing(role_sel, k=15, cohort=cohort_sel)
+        if top:
+            st.bar_chart(pd.DataFrame(top).set_index("skill")["share"])
+        st.markdown("**Coverage distribution**")
+        hist = store.coverage_histogram(role_sel, cohort_sel)
+        st.bar_chart(pd.DataFrame({"analyses": hist}).rename_axis("coverage %"))
+        st.markdown("**Trend**")
+        trend = store.trend(role_sel, cohort_sel, period=period)
+        if trend:
+            trend_df = pd.DataFrame(trend).set_index("period")
+            t1, t2 = st.columns(2)
+            t1.line_chart(trend_df["mean_coverage"])
+            t2.bar_chart(trend_df["analyses"])
+        if role_sel is None:
+            st.markdown("**By role**")
+            st.dataframe(pd.DataFrame(store.role_summary(cohort_sel)), use_container_width=True)
+
+# ----- diagnostics (opt-in) -----
+if trace is not None:
+    import pandas as pd
+    record = finish_trace(trace)
+    with st.expander("Diagnostics", expanded=True):
+        st.markdown(f"**This run:** {record['total_ms']:.1f} ms")
+        if record["stages"]:
+            st.table(pd.DataFrame.from_dict(record["stages"], orient="index"))
+        st.markdown("**Since process start**")
+        st.table(pd.DataFrame.from_dict(METRICS.snapshot(), orient="index"))
+        counters = METRICS.counters()
+        if counters.get("match_candidates"):
+            # share of candidate n-grams settled by hash lookups instead of fuzzy scoring
+            cut = 1 - counters.get("match_fuzzy", 0) / counters["match_candidates"]
+            st.markdown(f"**Skill matching:** {cut:.0%} of candidates resolved without fuzzy matching")
+            st.json(counters)
+        st.markdown("**Resume cache**")
+        st.json(get_resume_cache().stats())
+        st.markdown("**Word cloud cache**")
+        st.json(get_wordcloud_renderer().stats())
+        st.markdown("**PDF sandbox**")
+        st.json(get_pdf_sandbox().stats())
@@ -0,0 +1,246 @@
+# batch.py — headless batch analysis of many resumes against one or more roles
+#
+#   python batch.py resumes/ --role "Data Scientist" --role "Data Analyst" -o results.jsonl
+#   python batch.py "inbox/**/*.pdf" --workers 8 -o results.jsonl --resume
+#
+# One JSON line is written per resume as soon as it finishes. Re-running with
+# --resume skips files already present in the output file. Each resume is
+# analyzed in a sandboxed worker (see pdf_sandbox.py): one that runs past
+# --timeout or --memory-mb is recorded as an error instead of stalling the run.
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, CancelledError, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from cohort import get_cohort_store
+from fileio import iter_input_files
+from pdf_sandbox import DEFAULT_MAX_PAGES, HARD_TIMEOUT_GRACE, START_POLL, DocumentTimeout, PdfSandbox
+from skill_extractor import get_catalog, extract_resume_report, compare_to_role
+from taxonomy import open_catalog
+
+RESUME_SUFFIXES = ('.pdf', '.txt')
+
+# ---------------------------
+# Input discovery
+# ---------------------------
+def iter_resume_files(inputs):
+    """Yield resume paths from directories (searched recursively) and glob patterns."""
+    return iter_input_files(inputs, RESUME_SUFFIXES)
+
+def load_done(output_path):
+    """Files already recorded in a previous (possibly interrupted) run."""
+    done = set()
+    if not output_path or not os.path.exists(output_path):
+        return done
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)['file'])
+            except (ValueError, KeyError, TypeError):
+                # a half-written last line from an interrupted run
+                continue
+    return done
+
+def trim_partial_line(output_path, block=64 * 1024):
+    """Cut a half-written last line (from an interrupted run) off the output,
+    so lines appended on --resume start on a line of their own."""
+    with open(output_path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            start = max(0, pos - block)
+            f.seek(start)
+            newline = f.read(pos - start).rfind(b"\n")
+            if newline >= 0:
+                pos = start + newline + 1
+                break
+            pos = start
+        if pos != end:
+            f.truncate(pos)
+
+# ---------------------------
+# Worker side: the catalog and matcher are built once per process
+# ---------------------------
+_worker_catalog = None
+
+def _init_worker(job_skills_csv, resources_json, taxonomy=None):
+    global _worker_catalog
+    _worker_catalog = open_catalog(job_skills_csv, resources_json, taxonomy=taxonomy)
+    _worker_catalog.matcher  # compile now rather than on the first file
+
+def analyze_file(path, roles, max_pages=None):
+    catalog = _worker_catalog or get_catalog()
+    start = time.perf_counter()
+    try:
+        report = extract_resume_report(path, catalog.matcher, max_pages=max_pages)
+        record = {"file": path}
+        if report["error"] is not None:
+            # an error record: counted as such and kept out of the cohort store
+            record["error"] = report["error"]
+        if report["error"] is None or report["text"].strip():
+            skills = report["skills"]
+            record["skills"] = skills
+            record["roles"] = {role: compare_to_role(skills, role, catalog=catalog) for role in roles}
+        for field in ("pages", "total_pages", "truncated"):
+            record[field] = report[field]
+    except Exception as e:
+        record = {"file": path, "error": f"{type(e).__name__}: {e}"}
+    record["seconds"] = round(time.perf_counter() - start, 4)
+    return record
+
+# ---------------------------
+# Driver
+# ---------------------------
+def run_batch(files, roles, out, workers=None, job_skills_csv="job_skills.csv",
+              resources_json="resources.json", max_pending=None, progress=None, cohort=None,
+              timeout=120.0, memory_mb=2048, max_pages=DEFAULT_MAX_PAGES, max_files_per_worker=200,
+              taxonomy=None):
+    """Analyze ``files`` in a sandboxed process pool and write one JSON line per file to ``out``.
+
+    At most ``max_pending`` files are in flight at once, so memory stays bounded
+    no matter how many files are queued. Each file gets ``timeout`` seconds and
+    ``memory_mb`` of address space; workers are replaced every
+    ``max_files_per_worker`` files. With ``cohort``, every gap analysis is
+    also recorded in the cohort store under that label. With ``taxonomy`` (a
+    taxonomy.py file), workers map it instead of loading the role CSV.
+    Returns a summary dict.
+    """
+    store = get_cohort_store() if cohort is not None else None
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+    stats = {"processed": 0, "errors": 0, "timeouts": 0}
+    start = time.perf_counter()
+    files = iter(files)
+    hard = timeout + HARD_TIMEOUT_GRACE if timeout else None
+
+    def emit(record):
+        out.write(json.dumps(record) + "\n")
+        stats["processed"] += 1
+        if "error" in record:
+            stats["errors"] += 1
+        elif store is not None:
+            store.add_many([(role, gap, cohort) for role, gap in record["roles"].items()])
+
+    with PdfSandbox(workers=workers, timeout=timeout, memory_mb=memory_mb, max_pages=max_pages,
+                    max_docs_per_worker=max_files_per_worker, initializer=_init_worker,
+                    initargs=(job_skills_csv, resources_json, taxonomy)) as pool:
+        pending = {}  # future -> (path, attempt, pool generation)
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_pending:
+                path = next(files, None)
+                if path is None:
+                    exhausted = True
+                else:
+                    pending[pool.submit(analyze_file, path, roles, max_pages)] = (path, 1, pool.generation)
+            if not pending:
+                break
+            # wake up now and then to see which files have started, since each one's
+            # hard deadline counts from its start, not from its time in the queue
+            finished, _ = wait(pending, timeout=START_POLL if hard else None, return_when=FIRST_COMPLETED)
+            stuck = pool.overdue(set(pending) - finished, hard) if hard else set()
+            if stuck:
+                # past the alarm and the grace period, so stuck (e.g. in C code): kill
+                # the workers. Files that were running or queued beside them go back
+                # in the queue
+                pool.restart()
+                for fut, (path, attempt, _) in list(pending.items()):
+                    if fut in finished:
+                        continue
+                    if fut in stuck:
+                        del pending[fut]
+                        emit({"file": path, "error": f"no answer {hard:.0f}s after it started; worker restarted"})
+                        stats["timeouts"] += 1
+                    elif fut.done() and not fut.cancelled() and fut.exception() is None:
+                        finished.add(fut)  # came back just before the restart
+                    else:
+                        del pending[fut]
+                        pending[pool.submit(analyze_file, path, roles, max_pages)] = (path, attempt, pool.generation)
+            for fut in finished:
+                path, attempt, generation = pending.pop(fut)
+                try:
+                    record = fut.result()
+                except DocumentTimeout:
+                    record = {"file": path, "error": f"timed out after {timeout}s"}
+                    stats["timeouts"] += 1
+                except BrokenProcessPool:
+                    # a worker died (crash, or killed at the memory cap); every file in
+                    # flight fails with it, so retry each once on a fresh pool
+                    pool.restart(generation)
+                    if attempt == 1:
+                        pending[pool.submit(analyze_file, path, roles, max_pages)] = (path, 2, pool.generation)
+                        continue
+                    record = {"file": path, "error": "worker process died (crash or memory limit)"}
+                except CancelledError:
+                    # still queued on a pool that another file's failure restarted
+                    pending[pool.submit(analyze_file, path, roles, max_pages)] = (path, attempt, pool.generation)
+                    continue
+                emit(record)
+            out.flush()
+            if progress:
+                progress(stats, time.perf_counter() - start)
+    if store is not None:
+        store.close()
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = round(elapsed, 3)
+    stats["files_per_second"] = round(stats["processed"] / elapsed, 2) if elapsed > 0 else 0.0
+    return stats
+
+def _print_progress(stats, elapsed):
+    rate = stats["processed"] / elapsed if elapsed > 0 else 0.0
+    print(f"\r{stats['processed']} done, {stats['errors']} errors, {rate:.1f} files/s",
+          end="", file=sys.stderr, flush=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze many resumes against target roles and stream JSONL results.")
+    parser.add_argument("inputs", nargs="+", help="directories or glob patterns of PDF/TXT resumes")
+    parser.add_argument("--role", action="append", dest="roles", help="target role (repeatable; default: every role)")
+    parser.add_argument("-o", "--output", help="JSONL output file (default: stdout)")
+    parser.add_argument("--resume", action="store_true", help="append to --output and skip files already in it")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-pending", type=int, default=None, help="files in flight at once (default: 4 x workers)")
+    parser.add_argument("--job-skills", default="job_skills.csv")
+    parser.add_argument("--resources", default="resources.json")
+    parser.add_argument("--taxonomy", metavar="FILE", help="read roles and skills from a .tax file (see taxonomy.py)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds allowed per file (default: 120)")
+    parser.add_argument("--memory-mb", type=int, default=2048, help="address-space cap per worker (default: 2048)")
+    parser.add_argument("--max-pages", type=int, default=DEFAULT_MAX_PAGES,
+                        help=f"pages read per PDF (default: {DEFAULT_MAX_PAGES})")
+    parser.add_argument("--cohort", metavar="LABEL", help="also record the analyses for the cohort view under LABEL")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress line on stderr")
+    args = parser.parse_args(argv)
+
+    catalog = open_catalog(args.job_skills, args.resources, taxonomy=args.taxonomy)
+    roles = args.roles or list(catalog.roles)
+    unknown = [r for r in roles if catalog.required_skills(r) is None]
+    if unknown:
+        parser.error(f"unknown role(s): {', '.join(unknown)}")
+    if args.resume and not args.output:
+        parser.error("--resume needs --output")
+
+    done = load_done(args.output) if args.resume else set()
+    if args.resume and os.path.exists(args.output):
+        trim_partial_line(args.output)
+    files = (p for p in iter_resume_files(args.inputs) if p not in done)
+    out = open(args.output, 'a' if args.resume else 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        stats = run_batch(files, roles, out, workers=args.workers,
+                          job_skills_csv=args.job_skills, resources_json=args.resources,
+                          max_pending=args.max_pending,
+                          progress=None if args.quiet else _print_progress, cohort=args.cohort,
+                          timeout=args.timeout, memory_mb=args.memory_mb, max_pages=args.max_pages,
+                          taxonomy=args.taxonomy)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    stats["skipped"] = len(done)
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(json.dumps({"summary": stats}), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+# benchmark.py — reproducible offline benchmarks for the skill_extractor pipeline
+#
+#   python benchmark.py -o bench.json                       # full run
+#   python benchmark.py --quick -o new.json --baseline bench.json --threshold 0.25
+#
+# Everything is generated from a fixed seed: vocabularies, role tables, resumes
+# and multi-page PDFs. Each stage reports latency percentiles, throughput and
+# peak traced memory. With --baseline the run fails (exit 1) when any stage's
+# p50 is more than --threshold slower than in the baseline file.
+import argparse
+import csv
+import json
+import platform
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import skill_extractor as se
+
+FULL = {"vocab_sizes": [100, 1000, 10000, 50000], "role_counts": [25, 1000, 20000],
+        "resume_words": [100, 1000, 5000], "pdf_pages": [1, 5, 20], "repeat": 20,
+        "cold_start": {"vocab": 10000, "roles": 1000}, "fuzzy_vocab_sizes": [1000, 10000, 100000]}
+QUICK = {"vocab_sizes": [100, 1000], "role_counts": [25, 1000],
+         "resume_words": [100, 1000], "pdf_pages": [1, 5], "repeat": 5,
+         "cold_start": {"vocab": 1000, "roles": 100}, "fuzzy_vocab_sizes": [1000, 10000]}
+
+# ---------------------------
+# Synthetic data
+# ---------------------------
+_SYLLABLES = ["py", "tor", "da", "ta", "sql", "ku", "ber", "net", "es", "re", "act", "no", "de",
+              "mat", "lab", "cad", "flow", "ops", "ml", "an", "ly", "tics", "dev", "sec", "git"]
+_FILLER = ["experience", "with", "and", "the", "team", "built", "led", "using", "project",
+           "years", "in", "for", "data", "systems", "worked", "on", "a", "of", "to"]
+
+def synthetic_vocabulary(n, rng):
+    vocab = set()
+    while len(vocab) < n:
+        word = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+        if rng.random() < 0.3:
+            word += " " + "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3))).title()
+        vocab.add(word)
+    return sorted(vocab)
+
+def synthetic_roles(n_roles, vocab, rng, per_role=(5, 12)):
+    return [(f"Role {i}", rng.sample(vocab, min(len(vocab), rng.randint(*per_role)))) for i in range(n_roles)]
+
+def write_roles_csv(path, roles):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["role", "skills"])
+        for role, skills in roles:
+            w.writerow([role, ",".join(skills)])
+
+def synthetic_resume(n_words, vocab, rng, skill_rate=0.05, typo_rate=0.2):
+    words = []
+    while len(words) < n_words:
+        if rng.random() < skill_rate:
+            skill = rng.choice(vocab)
+            if rng.random() < typo_rate and len(skill) > 4:
+                i = rng.randrange(len(skill))
+                skill = skill[:i] + skill[i+1:]  # a dropped letter for the fuzzy stage
+            words.extend(skill.split())
+        else:
+            words.append(rng.choice(_FILLER))
+    return " ".join(words[:n_words])
+
+def synthetic_typos(n, vocab, rng):
+    """``n`` vocabulary entries, lowercased, each with one letter dropped."""
+    words = []
+    for skill in rng.sample(vocab, min(n, len(vocab))):
+        skill = skill.lower()
+        i = rng.randrange(len(skill))
+        words.append(skill[:i] + skill[i+1:])
+    return words
+
+def _pdf_escape(s):
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_pdf(path, pages, words_per_line=12, lines_per_page=45):
+    """Write a minimal text PDF (Helvetica, one content stream per page) without extra deps."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for text in pages:
+        words = text.split()
+        lines = [" ".join(words[i:i + words_per_line]) for i in range(0, len(words), words_per_line)]
+        ops = ["BT /F1 10 Tf 12 TL 40 800 Td"]
+        ops += [f"({_pdf_escape(line)}) Tj T*" for line in lines[:lines_per_page]]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        page_ids.append(len(objects))
+    kids = " ".join(f"{i} 0 R" for i in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    Path(path).write_bytes(bytes(out))
+
+# ---------------------------
+# Measurement
+# ---------------------------
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+def _summarize(stage, params, times, items=1):
+    times = sorted(times)
+    total = sum(times)
+    result = {
+        "stage": stage,
+        "params": params,
+        "n": len(times),
+        "p50_ms": round(_percentile(times, 50) * 1000, 3),
+        "p90_ms": round(_percentile(times, 90) * 1000, 3),
+        "p99_ms": round(_percentile(times, 99) * 1000, 3),
+        "mean_ms": round(total / len(times) * 1000, 3),
+        "items_per_s": round(len(times) * items / total, 2) if total > 0 else 0.0,
+        "peak_kb": None,
+    }
+    print(f"{stage:<24} {json.dumps(params):<40} p50={result['p50_ms']:>10.3f}ms "
+          f"p99={result['p99_ms']:>10.3f}ms", file=sys.stderr)
+    return result
+
+def measure(stage, params, fn, repeat, items=1):
+    """Time ``fn`` ``repeat`` times, then once more under tracemalloc for peak memory."""
+    fn()  # warm-up (imports, caches that are meant to be warm)
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = _summarize(stage, params, times, items)
+    result["peak_kb"] = round(peak / 1024, 1)
+    return result
+
+# timed in a fresh interpreter: module import, then catalog + matcher ready
+_COLD_START_SCRIPT = """
+import json, sys, time
+t0 = time.perf_counter()
+import skill_extractor
+t1 = time.perf_counter()
+skill_extractor.get_catalog(sys.argv[1], sys.argv[2]).matcher
+t2 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "catalog": t2 - t1}))
+"""
+
+def measure_cold_start(csv_path, resources, snapshot, repeat):
+    """Import + catalog-ready time in fresh processes, parsing the CSV vs loading ``snapshot``."""
+    src_dir = str(Path(se.__file__).resolve().parent)
+    runs = {"csv": [], "snapshot": [], "import": []}
+    for mode in ("csv", "snapshot"):
+        env = dict(os.environ, PYTHONPATH=src_dir,
+                   SKILLBRIDGE_SNAPSHOT=str(snapshot) if mode == "snapshot" else str(snapshot) + ".missing")
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, "-c", _COLD_START_SCRIPT, str(csv_path), str(resources)],
+                                 env=env, capture_output=True, text=True, check=True).stdout
+            timing = json.loads(out)
+            runs[mode].append(timing["catalog"])
+            runs["import"].append(timing["import"])
+    return runs
+
+def run_benchmarks(config, seed=0):
+    rng = random.Random(seed)
+    # separate stream for per-call picks, so the generated data doesn't depend on --repeat
+    pick = random.Random(seed + 1)
+    results = []
+    repeat = config["repeat"]
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        resources = tmp / "resources.json"
+        resources.write_text("{}", encoding="utf-8")
+        for n_vocab in config["vocab_sizes"]:
+            vocab = synthetic_vocabulary(n_vocab, rng)
+            # vocabulary build + CSV load over role tables of growing size
+            for n_roles in config["role_counts"]:
+                csv_path = tmp / f"roles_{n_vocab}_{n_roles}.csv"
+                roles = synthetic_roles(n_roles, vocab, rng)
+                write_roles_csv(csv_path, roles)
+                params = {"vocab": n_vocab, "roles": n_roles}
+                results.append(measure("load_job_skills", params,
+                                       lambda: se.load_job_skills(csv_path), repeat))
+                results.append(measure("build_skill_vocabulary", params,
+                                       lambda: se.build_skill_vocabulary(csv_path, resources), repeat))
+                catalog = se.SkillCatalog(csv_path, resources)
+                user_skills = rng.sample(vocab, min(len(vocab), 15))
+                role_names = [r for r, _ in roles]
+                results.append(measure("compare_to_role", params,
+                                       lambda: se.compare_to_role(user_skills, pick.choice(role_names), catalog=catalog),
+                                       repeat))
+                results.append(measure("best_fit_roles", params,
+                                       lambda: se.best_fit_roles(user_skills, k=10, catalog=catalog), repeat))
+            # matcher compile (cold) and text extraction (warm matcher)
+            results.append(measure("matcher_build", {"vocab": n_vocab},
+                                   lambda: se.SkillMatcher(vocab), max(1, repeat // 5)))
+            matcher = se.get_skill_matcher(vocab)
+            for n_words in config["resume_words"]:
+                text = synthetic_resume(n_words, vocab, rng)
+                # fuzzy answers are memoized on the matcher: time with it emptied
+                # (a new document) and with it full (the same words seen before)
+                results.append(measure("extract_skills_from_text", {"vocab": n_vocab, "words": n_words},
+                                       lambda: (matcher.fuzzy_memo.clear(), se.extract_skills_from_text(text, matcher)),
+                                       repeat, items=n_words))
+                results.append(measure("extract_skills_memo_warm", {"vocab": n_vocab, "words": n_words},
+                                       lambda: se.extract_skills_from_text(text, matcher), repeat, items=n_words))
+            for n_pages in config["pdf_pages"]:
+                pdf_path = tmp / f"resume_{n_vocab}_{n_pages}.pdf"
+                write_pdf(pdf_path, [synthetic_resume(400, vocab, rng) for _ in range(n_pages)])
+                results.append(measure("extract_skills_from_pdf", {"vocab": n_vocab, "pages": n_pages},
+                                       lambda: (matcher.fuzzy_memo.clear(),
+                                                se.extract_skills_from_file(pdf_path, matcher, cache=False)),
+                                       max(1, repeat // 2), items=n_pages))
+        # fuzzy lookups alone as the vocabulary grows: typos of vocabulary
+        # entries (near misses) and filler words (no match), memo emptied each run
+        scale_rng = random.Random(seed + 2)
+        for n_vocab in config["fuzzy_vocab_sizes"]:
+            vocab = synthetic_vocabulary(n_vocab, scale_rng)
+            matcher = se.SkillMatcher(vocab)
+            for kind, words in (("typo", synthetic_typos(200, vocab, scale_rng)), ("filler", _FILLER)):
+                results.append(measure("fuzzy_lookup", {"vocab": n_vocab, "words": kind},
+                                       lambda: (matcher.fuzzy_memo.clear(), [matcher.fuzzy(w) for w in words]),
+                                       repeat, items=len(words)))
+        # cold start: fresh interpreters, catalog from CSV vs from a prebuilt snapshot
+        cold = config["cold_start"]
+        vocab = synthetic_vocabulary(cold["vocab"], rng)
+        csv_path = tmp / "cold_roles.csv"
+        write_roles_csv(csv_path, synthetic_roles(cold["roles"], vocab, rng))
+        snapshot = se.write_catalog_snapshot(csv_path, resources, str(tmp / "cold_roles.snapshot"))
+        runs = measure_cold_start(csv_path, resources, snapshot, max(3, repeat // 4))
+        results.append(_summarize("cold_import", cold, runs["import"]))
+        results.append(_summarize("cold_catalog_csv", cold, runs["csv"]))
+        results.append(_summarize("cold_catalog_snapshot", cold, runs["snapshot"]))
+    return results
+
+# ---------------------------
+# Regression check
+# ---------------------------
+def _result_key(r):
+    return r["stage"], json.dumps(r["params"], sort_keys=True)
+
+def compare_results(baseline, current, threshold):
+    """Return human-readable regressions: stages whose p50 grew by more than ``threshold``."""
+    base = {_result_key(r): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        b = base.get(_result_key(r))
+        if not b or b["p50_ms"] <= 0:
+            continue
+        change = r["p50_ms"] / b["p50_ms"] - 1.0
+        if change > threshold:
+            regressions.append(f"{r['stage']} {json.dumps(r['params'])}: "
+                               f"p50 {b['p50_ms']}ms -> {r['p50_ms']}ms (+{change:.0%})")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark vocabulary build, CSV load, extraction and gap analysis.")
+    parser.add_argument("-o", "--output", help="write results JSON here")
+    parser.add_argument("--quick", action="store_true", help="small sizes only")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=None, help="timed runs per stage")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p50 slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    config = dict(QUICK if args.quick else FULL)
+    if args.repeat:
+        config["repeat"] = args.repeat
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": args.seed,
+            "config": config,
+        },
+        "results": run_benchmarks(config, args.seed),
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare_results(baseline, report, args.threshold)
+        for line in regressions:
+            print("REGRESSION " + line, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
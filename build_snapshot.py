@@ -0,0 +1,34 @@
+# build_snapshot.py — compile job_skills.csv + resources.json + aliases.json into a catalog snapshot
+#
+#   python build_snapshot.py                       # -> job_skills.snapshot
+#   python build_snapshot.py --job-skills roles.csv -o /srv/roles.snapshot
+#
+# get_catalog() loads the snapshot (plain JSON data) instead of parsing the CSV
+# whenever it was built from the same source files. Rebuild it after editing
+# them; a stale snapshot is simply ignored.
+import argparse
+import sys
+import time
+
+from skill_extractor import load_catalog_snapshot, write_catalog_snapshot
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a precompiled catalog snapshot.")
+    parser.add_argument("--job-skills", default="job_skills.csv")
+    parser.add_argument("--resources", default="resources.json")
+    parser.add_argument("--aliases", default="aliases.json")
+    parser.add_argument("-o", "--output", help="snapshot path (default: next to the CSV, or $SKILLBRIDGE_SNAPSHOT)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    path = write_catalog_snapshot(args.job_skills, args.resources, args.output, args.aliases)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    catalog = load_catalog_snapshot(path, args.job_skills, args.resources, args.aliases)
+    loaded = time.perf_counter() - start
+    print(f"wrote {path}: {len(catalog.roles)} roles, {len(catalog.vocabulary)} skills, "
+          f"version {catalog.version} (built in {built * 1000:.0f} ms, loads in {loaded * 1000:.1f} ms)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
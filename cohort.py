@@ -0,0 +1,330 @@
+# cohort.py — append-only store of gap analyses with incrementally maintained aggregates
+#
+#   store = get_cohort_store()
+#   store.add("Data Scientist", compare_to_role(skills, "Data Scientist"), cohort="spring-2025")
+#   store.top_missing("Data Scientist", k=10)
+#   store.role_summary()
+#
+# Each analysis is appended as one JSON line to analyses.jsonl. Aggregates per
+# (cohort, role) are folded in as lines are appended: analysis count, a
+# coverage histogram in 1% buckets, missing-skill counts and daily counts. They
+# are checkpointed to aggregates.json together with the log offset they cover,
+# so opening the store only reads the lines written since the last checkpoint.
+# Queries read the aggregates and never rescan the log, however long it gets.
+# Lines appended by other processes are picked up by refresh().
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from fileio import atomic_write
+
+DEFAULT_COHORT_DIR = os.environ.get("SKILLBRIDGE_COHORT_DIR", ".skillbridge_cohort")
+AGGREGATES_FORMAT = 1
+COVERAGE_BINS = 101  # 0%, 1%, ..., 100%
+_READ_CHUNK = 1 << 20
+
+class _Group:
+    """Aggregates for one (cohort, role)."""
+    __slots__ = ("cohort", "role", "n", "coverage_sum", "hist", "missing", "days")
+
+    def __init__(self, cohort, role):
+        self.cohort = cohort
+        self.role = role
+        self.n = 0
+        self.coverage_sum = 0.0
+        self.hist = [0] * COVERAGE_BINS
+        self.missing = {}  # skill id -> count
+        self.days = {}     # days since epoch (UTC) -> [analyses, coverage sum]
+
+    def to_json(self):
+        return {"cohort": self.cohort, "role": self.role, "n": self.n, "coverage_sum": self.coverage_sum,
+                "hist": self.hist, "missing": {str(k): v for k, v in self.missing.items()},
+                "days": {str(k): v for k, v in self.days.items()}}
+
+    @classmethod
+    def from_json(cls, d):
+        g = cls(d["cohort"], d["role"])
+        g.n = d["n"]
+        g.coverage_sum = d["coverage_sum"]
+        g.hist = list(d["hist"])
+        g.missing = {int(k): v for k, v in d["missing"].items()}
+        g.days = {int(k): list(v) for k, v in d["days"].items()}
+        return g
+
+class CohortStore:
+    """Analysis log + aggregates under ``directory``. Safe to share between
+    threads; several processes may append to the same directory."""
+
+    def __init__(self, directory=DEFAULT_COHORT_DIR, checkpoint_every=1000):
+        self.directory = Path(directory)
+        self.log_path = self.directory / "analyses.jsonl"
+        self.aggregates_path = self.directory / "aggregates.json"
+        self.checkpoint_every = checkpoint_every
+        self._lock = threading.RLock()
+        self._reset()
+        self._load_checkpoint()
+        self.refresh()
+
+    def _reset(self):
+        self.offset = 0
+        self.skills = []
+        self._skill_ids = {}
+        self._groups = {}
+        self._unsaved = 0
+
+    # --- writing ---
+    def add(self, role, result, cohort=None, ts=None):
+        """Record one compare_to_role ``result`` for ``role``."""
+        self.add_many([(role, result, cohort)], ts)
+
+    def add_many(self, items, ts=None):
+        """Record several (role, result, cohort) analyses with a single append."""
+        ts = time.time() if ts is None else ts
+        lines = []
+        for role, result, cohort in items:
+            if "error" in result:
+                raise ValueError(f"not a gap analysis: {result['error']}")
+            lines.append(json.dumps({"ts": ts, "cohort": cohort or "", "role": role,
+                                     "required": len(result["required"]), "matched": len(result["matched"]),
+                                     "missing": list(result["missing"])}) + "\n")
+        if not lines:
+            return
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # one write on an O_APPEND descriptor, so lines from concurrent processes don't interleave
+            fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, "".join(lines).encode("utf-8"))
+            finally:
+                os.close(fd)
+            self.refresh()
+
+    def refresh(self):
+        """Fold log lines written since the last call (by any process); returns how many."""
+        with self._lock:
+            try:
+                size = os.path.getsize(self.log_path)
+            except OSError:
+                return 0
+            if size < self.offset:
+                # log truncated or replaced: start over
+                self._reset()
+            folded = 0
+            with open(self.log_path, "rb") as f:
+                f.seek(self.offset)
+                pending = b""
+                while self.offset + len(pending) < size:
+                    chunk = f.read(min(_READ_CHUNK, size - self.offset - len(pending)))
+                    if not chunk:
+                        break
+                    data = pending + chunk
+                    end = data.rfind(b"\n") + 1
+                    for line in data[:end].splitlines():
+                        try:
+                            self._fold(json.loads(line))
+                            folded += 1
+                        except (ValueError, KeyError, TypeError):
+                            continue  # a damaged line; skip it rather than refuse the store
+                    self.offset += end
+                    pending = data[end:]
+            self._unsaved += folded
+            if self._unsaved >= self.checkpoint_every:
+                self.checkpoint()
+            return folded
+
+    def _fold(self, rec):
+        # read every field before touching the aggregates, so a bad line changes nothing
+        key = (str(rec["cohort"]), str(rec["role"]))
+        coverage = min(rec["matched"] / rec["required"], 1.0) if rec["required"] else 0.0
+        missing = [str(s) for s in rec["missing"]]
+        day = int(rec["ts"] // 86400)
+        g = self._groups.get(key)
+        if g is None:
+            g = self._groups[key] = _Group(*key)
+        g.n += 1
+        g.coverage_sum += coverage
+        g.hist[int(round(coverage * (COVERAGE_BINS - 1)))] += 1
+        for s in missing:
+            i = self._skill_ids.get(s)
+            if i is None:
+                i = self._skill_ids[s] = len(self.skills)
+                self.skills.append(s)
+            g.missing[i] = g.missing.get(i, 0) + 1
+        d = g.days.get(day)
+        if d is None:
+            g.days[day] = [1, coverage]
+        else:
+            d[0] += 1
+            d[1] += coverage
+
+    # --- checkpoints ---
+    def checkpoint(self):
+        """Write the aggregates and the log offset they cover (atomically)."""
+        with self._lock:
+            state = {"format": AGGREGATES_FORMAT, "offset": self.offset, "skills": self.skills,
+                     "groups": [g.to_json() for g in self._groups.values()]}
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with atomic_write(self.aggregates_path) as f:
+                f.write(json.dumps(state))
+            self._unsaved = 0
+
+    def _load_checkpoint(self):
+        try:
+            state = json.loads(self.aggregates_path.read_text(encoding="utf-8"))
+            log_size = os.path.getsize(self.log_path)
+        except (OSError, ValueError):
+            return
+        if state.get("format") != AGGREGATES_FORMAT or state["offset"] > log_size:
+            return  # stale or from another log: rebuilt from the log by refresh()
+        self.offset = state["offset"]
+        self.skills = list(state["skills"])
+        self._skill_ids = {s: i for i, s in enumerate(self.skills)}
+        for d in state["groups"]:
+            g = _Group.from_json(d)
+            self._groups[(g.cohort, g.role)] = g
+
+    def close(self):
+        with self._lock:
+            if self._unsaved:
+                self.checkpoint()
+
+    # --- queries ---
+    def _select(self, role=None, cohort=None):
+        with self._lock:
+            return [g for (c, r), g in self._groups.items()
+                    if (role is None or r == role) and (cohort is None or c == cohort)]
+
+    def cohorts(self):
+        with self._lock:
+            return sorted({c for c, _ in self._groups if c})
+
+    def roles(self, cohort=None):
+        return sorted({g.role for g in self._select(cohort=cohort)})
+
+    def count(self, role=None, cohort=None):
+        return sum(g.n for g in self._select(role, cohort))
+
+    def top_missing(self, role=None, k=10, cohort=None):
+        """Most often missing skills: dicts with skill, count and share of analyses."""
+        import numpy as np
+        groups = self._select(role, cohort)
+        n = sum(g.n for g in groups)
+        if not n:
+            return []
+        with self._lock:
+            ids = np.concatenate([np.fromiter(g.missing.keys(), dtype=np.int64, count=len(g.missing))
+                                  for g in groups])
+            counts = np.concatenate([np.fromiter(g.missing.values(), dtype=np.int64, count=len(g.missing))
+                                     for g in groups])
+            skills = list(self.skills)
+        totals = np.bincount(ids, weights=counts, minlength=len(skills))
+        top = np.argsort(-totals, kind="stable")[:k]
+        return [{"skill": skills[i], "count": int(totals[i]), "share": round(float(totals[i]) / n, 4)}
+                for i in top if totals[i] > 0]
+
+    def coverage_histogram(self, role=None, cohort=None):
+        """Analyses per coverage percent (array of COVERAGE_BINS counts)."""
+        import numpy as np
+        groups = self._select(role, cohort)
+        with self._lock:
+            hist = np.array([g.hist for g in groups], dtype=np.int64).reshape(len(groups), COVERAGE_BINS)
+        return hist.sum(axis=0)
+
+    def coverage_percentiles(self, role=None, qs=(25, 50, 75, 90), cohort=None):
+        """{q: coverage} read off the histogram (to the nearest percent)."""
+        hist = self.coverage_histogram(role, cohort)
+        return dict(zip(qs, _hist_percentiles(hist[None, :], qs)[0].tolist()))
+
+    def role_summary(self, cohort=None, qs=(25, 50, 75)):
+        """One dict per role: analyses, mean coverage, coverage percentiles and
+        the most often missing skill. All roles are computed in one pass over
+        stacked histograms."""
+        import numpy as np
+        groups = self._select(cohort=cohort)
+        roles = sorted({g.role for g in groups})
+        if not roles:
+            return []
+        index = {r: i for i, r in enumerate(roles)}
+        rows = np.array([index[g.role] for g in groups], dtype=np.int64)
+        with self._lock:
+            hist = np.array([g.hist for g in groups], dtype=np.int64)
+            n = np.array([g.n for g in groups], dtype=np.int64)
+            cov = np.array([g.coverage_sum for g in groups], dtype=np.float64)
+            sizes = [len(g.missing) for g in groups]
+            ids = np.fromiter((i for g in groups for i in g.missing.keys()), dtype=np.int64, count=sum(sizes))
+            counts = np.fromiter((c for g in groups for c in g.missing.values()), dtype=np.int64, count=sum(sizes))
+            skills = list(self.skills)
+        top = _top_per_row(np.repeat(rows, sizes), ids, counts, len(skills))
+        by_role = np.zeros((len(roles), COVERAGE_BINS), dtype=np.int64)
+        np.add.at(by_role, rows, hist)
+        n_role = np.bincount(rows, weights=n, minlength=len(roles))
+        mean = np.bincount(rows, weights=cov, minlength=len(roles)) / np.maximum(n_role, 1)
+        pct = _hist_percentiles(by_role, qs)
+        out = []
+        for i, role in enumerate(roles):
+            row = {"role": role, "analyses": int(n_role[i]), "mean_coverage": round(float(mean[i]), 4)}
+            row.update({f"p{q}": float(pct[i, j]) for j, q in enumerate(qs)})
+            row["top_missing"] = skills[top[i]] if i in top else None
+            out.append(row)
+        return out
+
+    def trend(self, role=None, cohort=None, period="day"):
+        """Analyses and mean coverage per day or week (weeks start on Monday)."""
+        import numpy as np
+        if period not in ("day", "week"):
+            raise ValueError("period must be 'day' or 'week'")
+        groups = self._select(role, cohort)
+        with self._lock:
+            days = [(d, v[0], v[1]) for g in groups for d, v in g.days.items()]
+        if not days:
+            return []
+        day, n, cov = (np.array(col) for col in zip(*days))
+        if period == "week":
+            day = day - (day + 3) % 7  # 1970-01-01 was a Thursday
+        keys, inverse = np.unique(day, return_inverse=True)
+        n_sum = np.bincount(inverse, weights=n)
+        cov_sum = np.bincount(inverse, weights=cov)
+        epoch = date(1970, 1, 1)
+        return [{"period": (epoch + timedelta(days=int(k))).isoformat(), "analyses": int(a),
+                 "mean_coverage": round(float(c / a), 4)} for k, a, c in zip(keys, n_sum, cov_sum)]
+
+    def stats(self):
+        with self._lock:
+            return {"analyses": sum(g.n for g in self._groups.values()), "groups": len(self._groups),
+                    "skills": len(self.skills), "log_bytes": self.offset, "unsaved": self._unsaved}
+
+def _hist_percentiles(hist, qs):
+    """Percentiles (as coverage fractions) for each row of a bucket-count matrix."""
+    import numpy as np
+    cum = np.cumsum(hist, axis=1)
+    total = cum[:, -1:]
+    out = np.zeros((hist.shape[0], len(qs)))
+    for j, q in enumerate(qs):
+        idx = (cum >= np.maximum(q / 100.0 * total, 1)).argmax(axis=1)
+        out[:, j] = np.where(total[:, 0] > 0, idx / (COVERAGE_BINS - 1), np.nan)
+    return out
+
+def _top_per_row(rows, ids, counts, n_ids):
+    """{row: id with the highest summed count} (lowest id on ties)."""
+    import numpy as np
+    if not len(ids):
+        return {}
+    keys, inverse = np.unique(rows * n_ids + ids, return_inverse=True)
+    totals = np.bincount(inverse, weights=counts)
+    key_rows, key_ids = keys // n_ids, keys % n_ids
+    order = np.lexsort((key_ids, -totals, key_rows))
+    first_rows, first = np.unique(key_rows[order], return_index=True)
+    return dict(zip(first_rows.tolist(), key_ids[order][first].tolist()))
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_cohort_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CohortStore()
+        return _store
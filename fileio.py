@@ -0,0 +1,42 @@
+# fileio.py — file helpers shared by the command-line tools and the stores
+#
+#   for path in iter_input_files(["resumes/", "inbox/**/*.pdf"], (".pdf", ".txt")): ...
+#   with atomic_write("role_weights.csv", newline="") as f: ...
+import contextlib
+import glob
+import os
+import threading
+from pathlib import Path
+
+def iter_input_files(inputs, suffixes):
+    """Yield files ending in one of ``suffixes`` (case-insensitive) from
+    directories (searched recursively) and glob patterns, in a stable order,
+    each once."""
+    suffixes = tuple(s.lower() for s in suffixes)
+    seen = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            paths = (str(p) for p in sorted(Path(item).rglob('*')))
+        else:
+            paths = sorted(glob.glob(item, recursive=True))
+        for p in paths:
+            if p.lower().endswith(suffixes) and os.path.isfile(p) and p not in seen:
+                seen.add(p)
+                yield p
+
+@contextlib.contextmanager
+def atomic_write(path, mode="w", encoding="utf-8", **kwargs):
+    """Write to a temporary file next to ``path`` and move it into place when
+    the block ends, so readers see the old file or the new one, never half of
+    it. On an exception the temporary file is removed and ``path`` left alone."""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    if "b" in mode:
+        encoding = None
+    try:
+        with open(tmp, mode, encoding=encoding, **kwargs) as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        raise
@@ -0,0 +1,207 @@
+# instrumentation.py — lightweight per-request timing spans + aggregated metrics
+#
+#   trace = start_trace("analyze")
+#   with span("pdf_parse"):
+#       ...
+#   count("fuzzy_candidates", 12)
+#   record = finish_trace(trace)   # aggregated into METRICS, logged as one JSON line
+#
+# Spans are only recorded while a trace is active in the current context
+# (thread / task); otherwise ``span`` returns a shared no-op, so instrumented
+# code pays one ContextVar lookup when diagnostics are off.
+import bisect
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger("skillbridge.timing")
+
+# histogram bucket upper bounds, in milliseconds
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, float("inf"))
+
+_current = contextvars.ContextVar("skillbridge_trace", default=None)
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOOP = _NoopSpan()
+
+class _Span:
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.spans.append((self.name, time.perf_counter() - self.start))
+        return False
+
+class Trace:
+    """Spans collected for one request (one analysis, one Streamlit rerun, ...)."""
+
+    def __init__(self, name):
+        self.name = name
+        self.spans = []
+        self.counters = {}
+        self.start = time.perf_counter()
+        self._token = None
+
+    def summary(self):
+        stages = {}
+        for name, seconds in self.spans:
+            s = stages.setdefault(name, {"count": 0, "ms": 0.0})
+            s["count"] += 1
+            s["ms"] += seconds * 1000
+        for s in stages.values():
+            s["ms"] = round(s["ms"], 3)
+        return {
+            "trace": self.name,
+            "total_ms": round((time.perf_counter() - self.start) * 1000, 3),
+            "stages": stages,
+            "counters": dict(self.counters),
+        }
+
+def span(name):
+    """Context manager timing ``name`` inside the active trace (no-op without one)."""
+    trace = _current.get()
+    if trace is None:
+        return _NOOP
+    return _Span(trace, name)
+
+def count(name, n=1):
+    """Add ``n`` to counter ``name`` in the active trace (no-op without one)."""
+    trace = _current.get()
+    if trace is not None:
+        trace.counters[name] = trace.counters.get(name, 0) + n
+
+def active():
+    return _current.get() is not None
+
+def start_trace(name):
+    trace = Trace(name)
+    trace._token = _current.set(trace)
+    return trace
+
+def finish_trace(trace):
+    """Close ``trace``, fold it into METRICS, log it, and return its summary."""
+    if trace._token is not None:
+        try:
+            _current.reset(trace._token)
+        except ValueError:
+            # finished from another context (e.g. a different thread): just detach
+            _current.set(None)
+        trace._token = None
+    record = trace.summary()
+    for name, seconds in trace.spans:
+        METRICS.observe(name, seconds)
+    METRICS.observe("trace:" + trace.name, record["total_ms"] / 1000)
+    for name, n in trace.counters.items():
+        METRICS.incr(name, n)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(record))
+    return record
+
+class traced:
+    """``with traced("batch_file"):`` — start_trace/finish_trace as a context manager."""
+
+    def __init__(self, name):
+        self.name = name
+        self.trace = None
+        self.record = None
+
+    def __enter__(self):
+        self.trace = start_trace(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        self.record = finish_trace(self.trace)
+        return False
+
+# ---------------------------
+# Process-wide aggregates: counters + fixed-bucket histograms per stage
+# ---------------------------
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def counters(self):
+        with self._lock:
+            return dict(sorted(self._counters.items()))
+
+    def observe(self, name, seconds):
+        ms = seconds * 1000
+        with self._lock:
+            s = self._stages.get(name)
+            if s is None:
+                s = self._stages[name] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                          "buckets": [0] * len(BUCKETS_MS)}
+            s["count"] += 1
+            s["total_ms"] += ms
+            s["max_ms"] = max(s["max_ms"], ms)
+            s["buckets"][bisect.bisect_left(BUCKETS_MS, ms)] += 1
+
+    def snapshot(self):
+        """Per-stage count, total/mean/max and bucket-estimated p50/p95, in ms."""
+        with self._lock:
+            stages = {k: dict(v, buckets=list(v["buckets"])) for k, v in self._stages.items()}
+        out = {}
+        for name, s in sorted(stages.items()):
+            out[name] = {
+                "count": s["count"],
+                "total_ms": round(s["total_ms"], 3),
+                "mean_ms": round(s["total_ms"] / s["count"], 3),
+                "max_ms": round(s["max_ms"], 3),
+                "p50_ms": _bucket_quantile(s["buckets"], s["count"], 0.50, s["max_ms"]),
+                "p95_ms": _bucket_quantile(s["buckets"], s["count"], 0.95, s["max_ms"]),
+            }
+        return out
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+def _bucket_quantile(buckets, count, q, max_ms):
+    # upper bound of the bucket holding the q-th observation (capped by the max seen)
+    target = q * count
+    seen = 0
+    for bound, n in zip(BUCKETS_MS, buckets):
+        seen += n
+        if seen >= target and n:
+            return round(min(bound, max_ms), 3)
+    return round(max_ms, 3)
+
+METRICS = Metrics()
+
+def configure_json_log(path=None):
+    """Write one JSON line per finished trace to ``path`` (``-`` or None: stderr)."""
+    handler = logging.StreamHandler(sys.stderr) if path in (None, "-") else logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return handler
+
+if os.environ.get("SKILLBRIDGE_TIMING_LOG"):
+    configure_json_log(os.environ["SKILLBRIDGE_TIMING_LOG"])
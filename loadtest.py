@@ -0,0 +1,342 @@
+# loadtest.py — offline load test: many concurrent Streamlit sessions against app.py
+#
+#   python loadtest.py --sessions 50 --visits 3 -o load.json
+#   python loadtest.py --sessions 20 -o new.json --baseline load.json --threshold 0.25
+#
+# Each simulated user opens the app in its own AppTest session (all in this one
+# process, like a single Streamlit server), picks a role, then provides a resume:
+# pasted text, a demo profile, a TXT upload or a PDF upload, drawn from --mix.
+# It clicks Analyze, switches the target role and asks for microplans.
+# Every rerun is timed. The report gives latency percentiles per action, peak
+# RSS (this process plus the PDF sandbox workers) and overall throughput, as
+# JSON in the benchmark.py format, so --baseline works the same way. Inputs are
+# generated from --seed. The resume cache and cohort store point at a scratch
+# directory, so the run starts cold and leaves no records behind.
+#
+# AppTest isn't built for concurrent use. Every run installs its own mock
+# Streamlit Runtime and clears it afterwards, and it compiles the script again
+# (CPython 3.11's parser is not safe to run from several threads at once).
+# While the load runs, all sessions share one runtime (media files, st.cache
+# storage) and one compiled script, as they would on a real server.
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# the resume cache and cohort store read their directories at import time, so the
+# scratch directory is chosen first; PDF sandbox workers (spawned, so they re-import
+# this module) inherit it instead of making their own
+_SCRATCH = os.environ.get("_SKILLBRIDGE_LOADTEST_SCRATCH")
+if _SCRATCH is None:
+    _SCRATCH = os.environ["_SKILLBRIDGE_LOADTEST_SCRATCH"] = tempfile.mkdtemp(prefix="skillbridge_loadtest_")
+os.environ.setdefault("SKILLBRIDGE_CACHE_DIR", os.path.join(_SCRATCH, "cache"))
+os.environ.setdefault("SKILLBRIDGE_COHORT_DIR", os.path.join(_SCRATCH, "cohort"))
+
+from benchmark import _summarize, compare_results, synthetic_resume, write_pdf
+from skill_extractor import get_catalog
+
+APP_DIR = Path(__file__).resolve().parent
+DEFAULT_MIX = "text=0.4,demo=0.1,txt=0.2,pdf=0.3"
+DEMO_PROFILES = ["Entry-level Data Scientist", "Career Switcher: Electrical → Data", "Experienced Software Engineer"]
+UPLOAD_STATE_KEY = "_loadtest_upload"
+
+# ---------------------------
+# Inputs
+# ---------------------------
+def parse_mix(spec):
+    """``"text=0.4,pdf=0.6"`` -> {"text": 0.4, "pdf": 0.6}."""
+    mix = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in ("text", "demo", "txt", "pdf"):
+            raise ValueError(f"unknown input kind {kind!r} (use text, demo, txt, pdf)")
+        mix[kind] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("the mix needs at least one positive weight")
+    return mix
+
+def build_inputs(n, mix, vocab, rng, scratch, words=(150, 600), pdf_pages=(1, 4)):
+    """``n`` (kind, payload) pairs; uploads carry (filename, bytes) like a browser would send."""
+    kinds, weights = zip(*mix.items())
+    inputs = []
+    for i in range(n):
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "text":
+            payload = synthetic_resume(rng.randint(*words), vocab, rng)
+        elif kind == "demo":
+            payload = rng.choice(DEMO_PROFILES)
+        elif kind == "txt":
+            payload = (f"resume_{i}.txt", synthetic_resume(rng.randint(*words), vocab, rng).encode("utf-8"))
+        else:
+            path = Path(scratch) / f"resume_{i}.pdf"
+            write_pdf(path, [synthetic_resume(400, vocab, rng) for _ in range(rng.randint(*pdf_pages))])
+            payload = (path.name, path.read_bytes())
+        inputs.append((kind, payload))
+    return inputs
+
+class _Upload(io.BytesIO):
+    """Stands in for Streamlit's UploadedFile (a BytesIO with name/type/size)."""
+
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+        self.type = "application/pdf" if name.endswith(".pdf") else "text/plain"
+        self.size = len(data)
+
+def _file_uploader(label, *args, **kwargs):
+    # AppTest can't drive st.file_uploader, so sessions put their upload in session state
+    import streamlit as st
+    upload = st.session_state.get(UPLOAD_STATE_KEY)
+    return _Upload(*upload) if upload else None
+
+# ---------------------------
+# Sessions
+# ---------------------------
+class Recorder:
+    """Thread-safe per-action latencies and error counts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.times = {}
+        self.errors = {}
+
+    def record(self, action, seconds, ok):
+        with self._lock:
+            self.times.setdefault(action, []).append(seconds)
+            if not ok:
+                self.errors[action] = self.errors.get(action, 0) + 1
+
+def _timed(recorder, action, step):
+    t = time.perf_counter()
+    try:
+        at = step()
+        ok = not at.exception
+    except Exception:
+        # AppTest raises on a rerun that exceeds its timeout
+        at, ok = None, False
+    recorder.record(action, time.perf_counter() - t, ok)
+    return at
+
+def run_visit(recorder, kind, payload, roles, rng, timeout, think):
+    """One user: open the app, analyze a resume, switch role, generate microplans."""
+    from streamlit.testing.v1 import AppTest
+    at = _timed(recorder, "load", lambda: AppTest.from_file(str(APP_DIR / "app.py"), default_timeout=timeout).run())
+    if at is None:
+        return
+    time.sleep(think)
+    at = _timed(recorder, "select_role", lambda: at.selectbox(key="role_choice").select(rng.choice(roles)).run())
+    if at is None:
+        return
+    time.sleep(think)
+    if kind == "text":
+        at.text_area(key="manual_text").input(payload)
+    elif kind == "demo":
+        at.selectbox(key="demo_choice").select(payload)
+    else:
+        at.session_state[UPLOAD_STATE_KEY] = payload
+    at = _timed(recorder, "analyze_" + kind, lambda: at.button[0].click().run())
+    if at is None:
+        return
+    time.sleep(think)
+    at = _timed(recorder, "switch_role", lambda: at.selectbox(key="role_choice").select(rng.choice(roles)).run())
+    if at is None:
+        return
+    time.sleep(think)
+    plans = [b for b in at.button if b.label.startswith("Generate microplans")]
+    if plans:
+        _timed(recorder, "microplans", lambda: plans[0].click().run())
+
+@contextlib.contextmanager
+def shared_runtime():
+    """One mock Runtime and script cache for every AppTest session for the duration of the block."""
+    from unittest.mock import MagicMock
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import local_script_runner
+    from streamlit.testing.v1.util import patch_config_options
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    script_cache = ScriptCache()
+    saved = Runtime.__dict__["instance"], Runtime.__dict__["exists"], local_script_runner.ScriptCache
+    Runtime.instance = classmethod(lambda cls: runtime)
+    Runtime.exists = classmethod(lambda cls: True)
+    local_script_runner.ScriptCache = lambda: script_cache
+    try:
+        # the sessions' own overlapping config patches can restore each other's
+        # mocks; this outer one puts the real config back once they are done
+        with patch_config_options({"global.appTest": True}):
+            yield runtime
+    finally:
+        Runtime.instance, Runtime.exists, local_script_runner.ScriptCache = saved
+
+# ---------------------------
+# Memory
+# ---------------------------
+def _tree_rss_bytes():
+    """RSS of this process and its direct children (the PDF sandbox workers); None off Linux."""
+    try:
+        pids = [str(os.getpid())]
+        for task in Path("/proc/self/task").iterdir():
+            pids += (task / "children").read_text().split()
+        page = os.sysconf("SC_PAGE_SIZE")
+        total = 0
+        for pid in pids:
+            try:
+                total += int(Path(f"/proc/{pid}/statm").read_text().split()[1]) * page
+            except (OSError, IndexError, ValueError):
+                continue  # a worker that exited between the listing and the read
+        return total
+    except (OSError, ValueError, AttributeError):
+        return None
+
+class RssSampler(threading.Thread):
+    def __init__(self, interval=0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            rss = _tree_rss_bytes()
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+def _own_peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+# ---------------------------
+# Driver
+# ---------------------------
+def run_load(sessions, visits, mix, seed=0, timeout=120, think=0.0, ramp=0.0):
+    """Run ``sessions`` concurrent users, ``visits`` each; return (results, totals)."""
+    import streamlit as st
+    # sessions driven from plain threads make Streamlit warn about missing script contexts
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+    rng = random.Random(seed)
+    catalog = get_catalog()
+    roles = sorted(catalog.roles)
+    inputs = build_inputs(sessions * visits, mix, sorted(catalog.vocabulary), rng, _SCRATCH)
+    recorder = Recorder()
+    real_uploader = st.file_uploader
+    st.file_uploader = _file_uploader
+
+    def user(i):
+        time.sleep(ramp * i / max(sessions, 1))
+        user_rng = random.Random(seed * 100003 + i)
+        for v in range(visits):
+            kind, payload = inputs[i * visits + v]
+            run_visit(recorder, kind, payload, roles, user_rng, timeout, think)
+
+    sampler = RssSampler()
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        with shared_runtime():
+            threads = [threading.Thread(target=user, args=(i,), name=f"session-{i}") for i in range(sessions)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+    finally:
+        elapsed = time.perf_counter() - start
+        sampler.stop()
+        st.file_uploader = real_uploader
+
+    params = {"sessions": sessions, "visits": visits}
+    results = []
+    for action in sorted(recorder.times):
+        result = _summarize(action, params, recorder.times[action])
+        result["errors"] = recorder.errors.get(action, 0)
+        results.append(result)
+    reruns = sum(len(t) for t in recorder.times.values())
+    analyses = sum(len(t) for a, t in recorder.times.items() if a.startswith("analyze_"))
+    totals = {
+        "seconds": round(elapsed, 3),
+        "reruns": reruns,
+        "errors": sum(recorder.errors.values()),
+        "reruns_per_s": round(reruns / elapsed, 2) if elapsed > 0 else 0.0,
+        "analyses_per_s": round(analyses / elapsed, 2) if elapsed > 0 else 0.0,
+        "peak_rss_mb": _own_peak_rss_mb(),
+        "peak_tree_rss_mb": round(sampler.peak / (1024 * 1024), 1) if sampler.peak else None,
+        "inputs": {kind: sum(1 for k, _ in inputs if k == kind) for kind in mix},
+    }
+    return results, totals
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive app.py with many concurrent headless sessions and report latency.")
+    parser.add_argument("-o", "--output", help="write results JSON here")
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent users")
+    parser.add_argument("--visits", type=int, default=3, help="analyses per user, each in a fresh session")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"input kinds and weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--think", type=float, default=0.0, help="seconds a user pauses between actions")
+    parser.add_argument("--ramp", type=float, default=0.0, help="seconds over which users start")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds before a rerun counts as failed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p50 slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    os.chdir(APP_DIR)  # app.py reads its CSV/JSON files relative to the working directory
+    try:
+        results, totals = run_load(args.sessions, args.visits, mix, seed=args.seed, timeout=args.timeout,
+                                   think=args.think, ramp=args.ramp)
+    finally:
+        shutil.rmtree(_SCRATCH, ignore_errors=True)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": args.seed,
+            "config": {"sessions": args.sessions, "visits": args.visits, "mix": mix,
+                       "think": args.think, "ramp": args.ramp},
+        },
+        "totals": totals,
+        "results": results,
+    }
+    print(json.dumps(totals), file=sys.stderr)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare_results(baseline, report, args.threshold)
+        for line in regressions:
+            print("REGRESSION " + line, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,310 @@
+# pdf_sandbox.py — parse untrusted PDFs in isolated worker processes with budgets
+#
+#   sandbox = get_pdf_sandbox()
+#   result = sandbox.parse(pdf_bytes)
+#   result["text"], result["pages"], result["truncated"], result["timed_out"], result["error"]
+#
+# Each document runs in a pool process that has an address-space cap
+# (RLIMIT_AS) and a wall-clock alarm. The parse stops at a page limit, and the
+# worker is replaced after a fixed number of documents. A document that runs
+# past its time returns the pages read so far. A worker that doesn't answer at
+# all is killed and the pool restarted, so one bad file can't stall the
+# process that asked for it.
+import io
+import itertools
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import weakref
+from concurrent.futures import CancelledError, ProcessPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import resource
+except ImportError:  # not on Windows: no memory cap there
+    resource = None
+
+DEFAULT_WORKERS = int(os.environ.get("SKILLBRIDGE_PDF_WORKERS", "2"))
+DEFAULT_TIMEOUT = float(os.environ.get("SKILLBRIDGE_PDF_TIMEOUT", "30"))
+DEFAULT_MEMORY_MB = int(os.environ.get("SKILLBRIDGE_PDF_MEMORY_MB", "1024"))
+DEFAULT_MAX_PAGES = 50
+# extra wait past the in-worker alarm before the worker is presumed stuck
+HARD_TIMEOUT_GRACE = 5.0
+# tasks whose start can be tracked at once (a ring of slots shared with the workers)
+_START_SLOTS = 1 << 16
+# how often callers check whether a queued task has started
+START_POLL = 0.1
+
+class DocumentTimeout(BaseException):
+    """Raised inside a worker when a document exceeds its time budget.
+    A BaseException so that broad ``except Exception`` blocks in parsers
+    can't swallow it."""
+
+# ---------------------------
+# Worker side
+# ---------------------------
+_started = None
+
+def _init_sandbox(memory_mb, started, initializer, initargs):
+    global _started
+    _started = started
+    if memory_mb and resource is not None:
+        soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+        limit = memory_mb * 1024 * 1024
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    if initializer is not None:
+        initializer(*initargs)
+
+def _on_alarm(signum, frame):
+    raise DocumentTimeout()
+
+def _run_limited(token, timeout, fn, args):
+    # tell the caller the task left the queue, so its hard deadline can start
+    _started[token % _START_SLOTS] = token
+    # tasks run on the worker's main thread, where signals are delivered
+    timed = bool(timeout) and hasattr(signal, "setitimer")
+    if timed:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return fn(*args)
+    finally:
+        if timed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+def _result(**fields):
+    result = {"text": "", "pages": 0, "total_pages": None, "truncated": False,
+              "timed_out": False, "error": None, "page_errors": 0}
+    result.update(fields)
+    return result
+
+def _parse_pdf(source, max_pages, max_chars):
+    """Runs in a worker: parse page by page, keeping whatever was read if the
+    document is cut short by a limit, the alarm or the memory cap."""
+    import pdfplumber
+    result = _result()
+    parts = []
+    chars = 0
+    try:
+        with pdfplumber.open(source if isinstance(source, str) else io.BytesIO(source)) as pdf:
+            result["total_pages"] = len(pdf.pages)
+            for p in pdf.pages:
+                if (max_pages is not None and result["pages"] >= max_pages) or \
+                        (max_chars is not None and chars >= max_chars):
+                    result["truncated"] = True
+                    break
+                try:
+                    t = p.extract_text() or ""
+                except (DocumentTimeout, MemoryError):
+                    raise
+                except Exception:
+                    # one unreadable page shouldn't cost the rest of the document
+                    result["page_errors"] += 1
+                    t = ""
+                finally:
+                    p.close()
+                result["pages"] += 1
+                if t:
+                    parts.append(t + "\n")
+                    chars += len(t)
+    except DocumentTimeout:
+        result.update(timed_out=True, truncated=True)
+    except MemoryError:
+        result.update(error="memory limit exceeded", truncated=True)
+    except Exception as e:
+        result.update(error=f"{type(e).__name__}: {e}", truncated=result["pages"] > 0)
+    result["text"] = "".join(parts)
+    return result
+
+# ---------------------------
+# Caller side
+# ---------------------------
+def _picklable(source):
+    if isinstance(source, (str, bytes)):
+        return source
+    if isinstance(source, os.PathLike):
+        return os.fspath(source)
+    if isinstance(source, (bytearray, memoryview)):
+        return bytes(source)
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    source.seek(0)
+    return source.read()
+
+class PdfSandbox:
+    """Pool of spawned worker processes that run one document at a time under
+    a wall-clock ``timeout`` (seconds) and a ``memory_mb`` address-space cap,
+    each replaced after ``max_docs_per_worker`` documents.
+
+    ``parse`` extracts PDF text; ``submit`` runs any picklable top-level
+    function under the same limits (batch.py runs whole analyses this way).
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT, memory_mb=DEFAULT_MEMORY_MB,
+                 max_pages=DEFAULT_MAX_PAGES, max_chars=None, max_docs_per_worker=25,
+                 initializer=None, initargs=()):
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.max_docs_per_worker = max_docs_per_worker
+        self.initializer = initializer
+        self.initargs = initargs
+        self._lock = threading.Lock()
+        self._generation = 0
+        # slot token % _START_SLOTS holds the last task token a worker started;
+        # plain shared memory, so a worker killed mid-write can't wedge anything
+        self._started = multiprocessing.get_context("spawn").RawArray("q", _START_SLOTS)
+        self._tokens = itertools.count(1)
+        # future -> [token, when the caller first saw it started]
+        self._starts = weakref.WeakKeyDictionary()
+        self._pool = self._new_pool()
+        self.documents = self.timeouts = self.errors = self.restarts = 0
+
+    def _new_pool(self):
+        # spawn: safe to start from threaded code (Streamlit, HTTP handlers),
+        # and required for max_tasks_per_child
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_sandbox,
+                                   initargs=(self.memory_mb, self._started, self.initializer, self.initargs),
+                                   max_tasks_per_child=self.max_docs_per_worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        with self._lock:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def generation(self):
+        """Bumped on every restart; pass it back to ``restart`` to avoid restarting twice for one failure."""
+        with self._lock:
+            return self._generation
+
+    def restart(self, generation=None):
+        """Kill the workers and start fresh ones (unless already restarted since ``generation``)."""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            old = self._pool
+            self._pool = self._new_pool()
+            self._generation += 1
+            self.restarts += 1
+        # ProcessPoolExecutor can't cancel a running task; stop its processes directly
+        for p in list((getattr(old, "_processes", None) or {}).values()):
+            p.terminate()
+        old.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn, *args):
+        """Future for ``fn(*args)`` run in a worker under the time and memory limits.
+        Over time it raises DocumentTimeout; if the pool had to be restarted, BrokenProcessPool."""
+        with self._lock:
+            token = next(self._tokens)
+            fut = self._pool.submit(_run_limited, token, self.timeout, fn, args)
+            self._starts[fut] = [token, None]
+            return fut
+
+    def started_at(self, fut):
+        """``time.monotonic()`` when a worker was first seen running ``fut`` (a
+        future from ``submit``), or None while it is still queued. Unlike
+        ``fut.running()`` this excludes time spent in the executor's call queue."""
+        with self._lock:
+            entry = self._starts.get(fut)
+            if entry is None:
+                return None
+            if entry[1] is None and self._started[entry[0] % _START_SLOTS] == entry[0]:
+                entry[1] = time.monotonic()
+            return entry[1]
+
+    def overdue(self, futures, hard):
+        """The futures among ``futures`` (from ``submit``) that have been running
+        for ``hard`` seconds or more."""
+        now = time.monotonic()
+        late = set()
+        for fut in futures:
+            started = self.started_at(fut)
+            if started is not None and now - started >= hard:
+                late.add(fut)
+        return late
+
+    def result(self, fut, hard):
+        """``fut.result()``, raising FutureTimeout once the task has been running
+        for ``hard`` seconds. Time spent queued behind other tasks doesn't count."""
+        while True:
+            started = self.started_at(fut)
+            if started is None:
+                wait_for = START_POLL
+            elif hard is None:
+                wait_for = None
+            else:
+                wait_for = started + hard - time.monotonic()
+                if wait_for <= 0:
+                    raise FutureTimeout()
+            done, _ = wait([fut], timeout=wait_for)
+            if done:
+                return fut.result()
+
+    def parse(self, source, max_pages=None, max_chars=None):
+        """Parse a PDF (path, bytes or binary file object) and return a dict:
+        text, pages (parsed), total_pages, truncated, timed_out, error,
+        page_errors and seconds. Never raises for a bad document."""
+        max_pages = self.max_pages if max_pages is None else max_pages
+        max_chars = self.max_chars if max_chars is None else max_chars
+        source = _picklable(source)
+        start = time.perf_counter()
+        for attempt in (1, 2):
+            generation = self.generation
+            try:
+                fut = self.submit(_parse_pdf, source, max_pages, max_chars)
+                hard = self.timeout + HARD_TIMEOUT_GRACE if self.timeout else None
+                result = self.result(fut, hard)
+            except DocumentTimeout:
+                # out of time before the parse itself started (e.g. importing pdfplumber)
+                result = _result(timed_out=True, truncated=True)
+            except FutureTimeout:
+                self.restart(generation)
+                result = _result(timed_out=True, truncated=True,
+                                 error=f"no answer {hard:.0f}s after it started; worker restarted")
+            except (BrokenProcessPool, CancelledError):
+                # a worker died, maybe on another document sharing the pool, or another
+                # document's restart dropped this one from the queue: try once more
+                self.restart(generation)
+                if attempt == 1:
+                    continue
+                result = _result(error="worker process died (crash or memory limit)")
+            except Exception as e:
+                result = _result(error=f"{type(e).__name__}: {e}")
+            break
+        result["seconds"] = round(time.perf_counter() - start, 4)
+        with self._lock:
+            self.documents += 1
+            self.timeouts += result["timed_out"]
+            self.errors += result["error"] is not None
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {"documents": self.documents, "timeouts": self.timeouts, "errors": self.errors,
+                    "restarts": self.restarts, "workers": self.workers}
+
+_sandbox = None
+_sandbox_lock = threading.Lock()
+
+def get_pdf_sandbox():
+    """Process-wide PdfSandbox (SKILLBRIDGE_PDF_WORKERS / _TIMEOUT / _MEMORY_MB)."""
+    global _sandbox
+    with _sandbox_lock:
+        if _sandbox is None:
+            _sandbox = PdfSandbox()
+        return _sandbox
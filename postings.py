@@ -0,0 +1,379 @@
+# postings.py — stream job-posting dumps into per-role skill weights
+#
+#   python postings.py dumps/ -o role_weights.csv --workers 8
+#   python postings.py "scrape/*.jsonl.gz" -o role_weights.csv --resume
+#   python postings.py dumps/ -o role_weights.csv --profiles-csv derived_job_skills.csv
+#
+# CSV and JSONL files (optionally gzipped) are read in chunks. Each posting's
+# title is mapped to a catalog role, and its title and description go through
+# the skill matcher in a process pool. The per-role counts of postings and
+# skill mentions are bounded by roles x vocabulary, whatever the size of the
+# dump. The output table (role, skill, weight = share of the role's postings
+# that ask for the skill) is what compare_to_role uses to order missing
+# skills; see get_role_weights in skill_extractor.py.
+#
+# Progress is checkpointed next to the output. --resume continues from the
+# last posting the checkpoint covers, with the same counts as an
+# uninterrupted run.
+import argparse
+import csv
+import gzip
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from fileio import atomic_write, iter_input_files
+from skill_extractor import extract_skills_from_text, get_catalog
+from taxonomy import open_catalog
+
+POSTING_SUFFIXES = ('.csv', '.jsonl', '.ndjson', '.csv.gz', '.jsonl.gz', '.ndjson.gz')
+ROLE_FIELDS = ("role", "title", "job_title", "position", "jobtitle")
+TEXT_FIELDS = ("description", "text", "job_description", "body", "summary")
+CHECKPOINT_FORMAT = 1
+MAX_TEXT_CHARS = 20000  # postings are short; anything longer is boilerplate or a scrape error
+
+# ---------------------------
+# Reading dumps
+# ---------------------------
+def iter_posting_files(inputs):
+    """Posting files from directories (searched recursively) and glob patterns, in a stable order."""
+    return iter_input_files(inputs, POSTING_SUFFIXES)
+
+def _open_text(path):
+    if path.lower().endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace', newline='')
+    return open(path, 'r', encoding='utf-8', errors='replace', newline='')
+
+def _pick(record, fields, preferred=None):
+    if preferred:
+        return record.get(preferred)
+    for f in fields:
+        value = record.get(f)
+        if value:
+            return value
+    return None
+
+def iter_records(path, skip=0):
+    """Yield posting dicts from a CSV or JSONL file, after the first ``skip``.
+    A malformed JSON line yields None so that positions stay countable."""
+    # long descriptions exceed csv's default 128 KB field limit
+    csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+    with _open_text(path) as f:
+        if '.csv' in path.lower():
+            for i, row in enumerate(csv.DictReader(f)):
+                if i >= skip:
+                    yield row
+            return
+        for i, line in enumerate(f):
+            if i < skip:
+                continue  # resuming: no need to parse what was already counted
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield record if isinstance(record, dict) else None
+
+class RoleResolver:
+    """Maps free-text job titles ("Senior Data Scientist II") to catalog roles:
+    an exact match, else the longest role name found in the title."""
+
+    def __init__(self, roles, keep_unknown=False):
+        self.roles = {r.lower(): r for r in roles}
+        names = sorted(self.roles, key=len, reverse=True)
+        self.pattern = re.compile(r"\b(" + "|".join(map(re.escape, names)) + r")\b", re.I) if names else None
+        self.keep_unknown = keep_unknown
+        self._memo = {}
+
+    def resolve(self, title):
+        """Catalog role for ``title``; the cleaned title itself with keep_unknown; else None."""
+        title = " ".join(str(title or "").split())
+        if not title:
+            return None
+        role = self._memo.get(title, False)
+        if role is not False:
+            return role
+        role = self.roles.get(title.lower())
+        if role is None and self.pattern is not None:
+            m = self.pattern.search(title)
+            role = self.roles[m.group(1).lower()] if m else None
+        if role is None and self.keep_unknown:
+            role = title
+        if len(self._memo) >= 100_000:
+            self._memo.clear()  # titles repeat a lot, but not unboundedly
+        self._memo[title] = role
+        return role
+
+# ---------------------------
+# Worker side: the matcher is built once per process
+# ---------------------------
+_worker_matcher = None
+
+def _init_worker(job_skills_csv, resources_json, taxonomy=None):
+    global _worker_matcher
+    _worker_matcher = open_catalog(job_skills_csv, resources_json, taxonomy=taxonomy).matcher
+
+def match_chunk(postings):
+    """Runs in a worker: {role: [postings, {skill: postings mentioning it}]} for a chunk of (role, text)."""
+    matcher = _worker_matcher or get_catalog().matcher
+    counts = {}
+    for role, text in postings:
+        entry = counts.setdefault(role, [0, {}])
+        entry[0] += 1
+        skills = entry[1]
+        for s in extract_skills_from_text(text, matcher):
+            skills[s] = skills.get(s, 0) + 1
+    return counts
+
+# ---------------------------
+# Aggregates and checkpoints
+# ---------------------------
+class RoleSkillCounts:
+    """Postings per role and, per role, postings that mention each skill.
+
+    ``position`` is (file index, records read in that file): everything before it
+    is folded in, nothing after it is.
+    """
+
+    def __init__(self, files, version, max_roles=5000):
+        self.files = list(files)
+        self.version = version
+        self.max_roles = max_roles
+        self.position = (0, 0)
+        self.roles = {}
+        self.stats = {"records": 0, "postings": 0, "unmatched_role": 0, "bad_records": 0, "dropped_roles": 0}
+
+    def fold(self, counts):
+        for role, (n, skills) in counts.items():
+            entry = self.roles.get(role)
+            if entry is None:
+                if len(self.roles) >= self.max_roles:
+                    # only reachable with keep_unknown: stay bounded, but say how much was left out
+                    self.stats["dropped_roles"] += n
+                    continue
+                entry = self.roles[role] = [0, {}]
+            entry[0] += n
+            totals = entry[1]
+            for s, c in skills.items():
+                totals[s] = totals.get(s, 0) + c
+
+    def save(self, path):
+        state = {"format": CHECKPOINT_FORMAT, "files": self.files, "version": self.version,
+                 "position": list(self.position), "stats": self.stats, "roles": self.roles}
+        with atomic_write(path) as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, path, files, version, max_roles=5000):
+        """Counts from a checkpoint, or None if there is none. Raises ValueError for one
+        written for other input files, another skill catalog or other options."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        if state.get("format") != CHECKPOINT_FORMAT:
+            raise ValueError(f"{path}: unknown checkpoint format")
+        if state["files"] != list(files):
+            raise ValueError(f"{path}: checkpoint is for a different set of input files")
+        if state["version"] != version:
+            raise ValueError(f"{path}: checkpoint was built with a different skill catalog or title/field options")
+        counts = cls(files, version, max_roles)
+        counts.position = tuple(state["position"])
+        counts.stats.update(state["stats"])
+        counts.roles = {role: [n, dict(skills)] for role, (n, skills) in state["roles"].items()}
+        return counts
+
+    def table(self, min_postings=20, min_weight=0.05, top_k=30):
+        """[(role, skill, weight, role postings)], weight = share of the role's postings
+        that mention the skill; heaviest first within each role."""
+        rows = []
+        for role in sorted(self.roles):
+            n, skills = self.roles[role]
+            if n < min_postings:
+                continue
+            ranked = sorted(skills.items(), key=lambda kv: (-kv[1], kv[0]))
+            for skill, c in ranked[:top_k]:
+                weight = c / n
+                if weight >= min_weight:
+                    rows.append((role, skill, round(weight, 4), n))
+        return rows
+
+def write_role_weights(path, rows):
+    """Write the role,skill,weight,postings table read by ``skill_extractor.load_role_weights``."""
+    with atomic_write(path, newline='') as f:
+        w = csv.writer(f)
+        w.writerow(["role", "skill", "weight", "postings"])
+        w.writerows(rows)
+
+def write_profiles(path, rows):
+    """The same table as a job_skills.csv-style role,skills file (skills heaviest first)."""
+    profiles = {}
+    for role, skill, _, _ in rows:
+        profiles.setdefault(role, []).append(skill)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(["role", "skills"])
+        for role, skills in profiles.items():
+            w.writerow([role, ",".join(skills)])
+
+# ---------------------------
+# Driver
+# ---------------------------
+def _new_tally():
+    return {"records": 0, "unmatched_role": 0, "bad_records": 0}
+
+def _chunks(files, position, resolver, chunk_size, role_field=None, text_field=None):
+    """Yield (position after the chunk, [(role, text)], record tally) starting at ``position``."""
+    start_file, start_record = position
+    for fi in range(start_file, len(files)):
+        skip = start_record if fi == start_file else 0
+        position = skip
+        chunk, tally = [], _new_tally()
+        for record in iter_records(files[fi], skip):
+            position += 1
+            tally["records"] += 1
+            if record is None:
+                tally["bad_records"] += 1
+                continue
+            title = _pick(record, ROLE_FIELDS, role_field)
+            role = resolver.resolve(title)
+            if role is None:
+                tally["unmatched_role"] += 1
+                continue
+            text = str(_pick(record, TEXT_FIELDS, text_field) or "")[:MAX_TEXT_CHARS]
+            chunk.append((role, f"{title}\n{text}"))
+            if len(chunk) >= chunk_size:
+                yield (fi, position), chunk, tally
+                chunk, tally = [], _new_tally()
+        # also sent when empty: it moves the position on to the next file
+        yield (fi + 1, 0), chunk, tally
+
+def run_ingest(files, output, checkpoint=None, resume=False, workers=None, chunk_size=500, max_pending=None,
+               job_skills_csv="job_skills.csv", resources_json="resources.json", keep_unknown=False,
+               role_field=None, text_field=None, min_postings=20, min_weight=0.05, top_k=30,
+               profiles_csv=None, checkpoint_every=60.0, progress=None, taxonomy=None):
+    """Aggregate ``files`` into a role weights table at ``output``; returns a summary dict.
+    With ``taxonomy`` (a taxonomy.py file), roles and skills come from it instead of the CSV."""
+    files = list(files)
+    checkpoint = checkpoint or str(output) + ".ckpt"
+    catalog = open_catalog(job_skills_csv, resources_json, taxonomy=taxonomy)
+    # a checkpoint only continues a run that maps and matches postings the same way
+    version = json.dumps([catalog.version, keep_unknown, role_field, text_field])
+    counts = RoleSkillCounts.load(checkpoint, files, version) if resume else None
+    resumed = counts is not None
+    counts = counts or RoleSkillCounts(files, version)
+    resolver = RoleResolver(catalog.roles, keep_unknown)
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+    start = time.perf_counter()
+    postings_before = counts.stats["postings"]
+    last_save = time.monotonic()
+    chunks = _chunks(files, counts.position, resolver, chunk_size, role_field, text_field)
+    # chunks finish out of order but are folded in order, so the checkpoint
+    # position always has exactly the postings before it folded in
+    pending = {}
+    done = {}
+    next_submit = next_fold = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(job_skills_csv, resources_json, taxonomy)) as pool:
+            exhausted = False
+            while pending or done or not exhausted:
+                while not exhausted and len(pending) + len(done) < max_pending:
+                    item = next(chunks, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    position, chunk, tally = item
+                    if chunk:
+                        pending[pool.submit(match_chunk, chunk)] = (next_submit, position, len(chunk), tally)
+                    else:
+                        done[next_submit] = (position, 0, tally, {})
+                    next_submit += 1
+                if pending:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in finished:
+                        seq, position, n, tally = pending.pop(fut)
+                        done[seq] = (position, n, tally, fut.result())
+                while next_fold in done:
+                    position, n, tally, result = done.pop(next_fold)
+                    counts.fold(result)
+                    for k, v in tally.items():
+                        counts.stats[k] += v
+                    counts.stats["postings"] += n
+                    counts.position = position
+                    next_fold += 1
+                if time.monotonic() - last_save >= checkpoint_every:
+                    counts.save(checkpoint)
+                    last_save = time.monotonic()
+                if progress:
+                    progress(counts.stats, counts.stats["postings"] - postings_before, time.perf_counter() - start)
+    except KeyboardInterrupt:
+        counts.save(checkpoint)  # folded in order, so always a consistent point to resume from
+        raise
+    counts.save(checkpoint)
+    rows = counts.table(min_postings, min_weight, top_k)
+    write_role_weights(output, rows)
+    if profiles_csv:
+        write_profiles(profiles_csv, rows)
+    elapsed = time.perf_counter() - start
+    processed = counts.stats["postings"] - postings_before
+    summary = dict(counts.stats)
+    summary.update(resumed=resumed, roles=len(counts.roles), table_roles=len({r[0] for r in rows}),
+                   table_rows=len(rows), seconds=round(elapsed, 3),
+                   postings_per_second=round(processed / elapsed, 1) if elapsed > 0 else 0.0)
+    return summary
+
+def _print_progress(stats, processed, elapsed):
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"\r{stats['postings']} postings matched ({stats['records']} read), {rate:.0f} postings/s",
+          end="", file=sys.stderr, flush=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build per-role skill weights from CSV/JSONL job-posting dumps.")
+    parser.add_argument("inputs", nargs="+", help="directories or glob patterns of .csv/.jsonl[.gz] files")
+    parser.add_argument("-o", "--output", default="role_weights.csv", help="weights table (default: role_weights.csv)")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: OUTPUT.ckpt)")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="postings per task (default: 500)")
+    parser.add_argument("--max-pending", type=int, default=None, help="chunks in flight (default: 4 x workers)")
+    parser.add_argument("--checkpoint-every", type=float, default=60.0, help="seconds between checkpoints")
+    parser.add_argument("--role-field", help="record field with the job title (default: first of %s)" % ", ".join(ROLE_FIELDS))
+    parser.add_argument("--text-field", help="record field with the description (default: first of %s)" % ", ".join(TEXT_FIELDS))
+    parser.add_argument("--all-titles", action="store_true",
+                        help="keep titles that match no catalog role, as roles of their own")
+    parser.add_argument("--min-postings", type=int, default=20, help="leave out roles with fewer postings")
+    parser.add_argument("--min-weight", type=float, default=0.05, help="leave out skills in fewer than this share of postings")
+    parser.add_argument("--top-k", type=int, default=30, help="skills kept per role")
+    parser.add_argument("--profiles-csv", help="also write the table as a job_skills.csv-style role,skills file")
+    parser.add_argument("--job-skills", default="job_skills.csv")
+    parser.add_argument("--resources", default="resources.json")
+    parser.add_argument("--taxonomy", metavar="FILE", help="read roles and skills from a .tax file (see taxonomy.py)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress line on stderr")
+    args = parser.parse_args(argv)
+
+    files = list(iter_posting_files(args.inputs))
+    if not files:
+        parser.error("no .csv/.jsonl posting files found")
+    try:
+        summary = run_ingest(files, args.output, checkpoint=args.checkpoint, resume=args.resume,
+                             workers=args.workers, chunk_size=args.chunk_size, max_pending=args.max_pending,
+                             job_skills_csv=args.job_skills, resources_json=args.resources,
+                             keep_unknown=args.all_titles, role_field=args.role_field, text_field=args.text_field,
+                             min_postings=args.min_postings, min_weight=args.min_weight, top_k=args.top_k,
+                             profiles_csv=args.profiles_csv, checkpoint_every=args.checkpoint_every,
+                             progress=None if args.quiet else _print_progress, taxonomy=args.taxonomy)
+    except ValueError as e:
+        parser.error(str(e))
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(json.dumps({"summary": summary}), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# resume_cache.py — content-addressed cache of extracted resume text + skills
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from fileio import atomic_write
+
+DEFAULT_CACHE_DIR = os.environ.get("SKILLBRIDGE_CACHE_DIR", ".skillbridge_cache")
+
+def content_key(data, vocabulary_version, *params):
+    """Cache key: SHA-256 of the file bytes + vocabulary version (+ any extraction params)."""
+    digest = hashlib.sha256(data).hexdigest()
+    extra = "-".join(str(p) for p in params if p is not None)
+    return f"{digest}-{vocabulary_version}" + (f"-{extra}" if extra else "")
+
+class ResumeCache:
+    """Two-level LRU cache of ``{"text": ..., "skills": [...]}`` entries, plus
+    any metadata fields given to ``put`` (e.g. how many PDF pages were read).
+
+    The memory level holds at most ``max_entries`` entries. The disk level
+    (one JSON file per key under ``cache_dir``) is kept under ``max_disk_bytes``
+    by evicting the least recently used files; pass ``cache_dir=None`` to keep
+    everything in memory.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_entries=256, max_disk_bytes=64 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._disk_sizes = None  # filename -> size, loaded on first disk write
+        self._lock = threading.Lock()
+        self.hits = self.memory_hits = self.disk_hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return entry
+            entry = self._read_disk(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, entry)
+            return entry
+
+    def put(self, key, text, skills, **meta):
+        entry = dict(meta, text=text, skills=list(skills))
+        with self._lock:
+            self._remember(key, entry)
+            self._write_disk(key, entry)
+        return entry
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._memory),
+                "disk_bytes": sum(self._disk_sizes.values()) if self._disk_sizes else 0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self.cache_dir and self.cache_dir.is_dir():
+                for f in self.cache_dir.glob("*.json"):
+                    f.unlink(missing_ok=True)
+            self._disk_sizes = None
+
+    # --- internals (called with the lock held) ---
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        fp = self.cache_dir / f"{key}.json"
+        try:
+            with open(fp, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(fp)  # mark as recently used
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, entry):
+        if not self.cache_dir:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            if self._disk_sizes is None:
+                self._disk_sizes = {f.name: f.stat().st_size for f in self.cache_dir.glob("*.json")}
+            fp = self.cache_dir / f"{key}.json"
+            with atomic_write(fp) as f:
+                f.write(json.dumps(entry))
+            self._disk_sizes[fp.name] = fp.stat().st_size
+            if sum(self._disk_sizes.values()) > self.max_disk_bytes:
+                self._evict_disk()
+        except OSError:
+            pass
+
+    def _evict_disk(self):
+        # other processes may share the directory: rescan before evicting
+        files = []
+        for f in self.cache_dir.glob("*.json"):
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, f, st.st_size))
+        files.sort(key=lambda x: x[0])
+        self._disk_sizes = {f.name: size for _, f, size in files}
+        total = sum(self._disk_sizes.values())
+        for _, f, size in files:
+            if total <= self.max_disk_bytes:
+                break
+            f.unlink(missing_ok=True)
+            self._disk_sizes.pop(f.name, None)
+            total -= size
+            self.evictions += 1
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_resume_cache():
+    """Process-wide default cache used by ``extract_skills_from_file``."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResumeCache()
+        return _default_cache
@@ -0,0 +1,254 @@
+# service.py — headless HTTP API over the skill_extractor functions
+#
+#   python service.py --port 8080 --pdf-workers 4
+#
+# Endpoints (JSON in, JSON out):
+#   POST /analyze      {"text" | "skills" | "pdf_base64", "role"}        -> skills + gap analysis
+#   POST /best-roles   {"text" | "skills" | "pdf_base64", "k": 5}        -> top-k roles
+#                      (with pdf_base64, both also report how much of the PDF was read)
+#   POST /microplan    {"skills": [...]} or {"role", "text" | ...}       -> 30-day plans
+#   GET  /health       catalog version, role count
+#   GET  /metrics      request counters, stage timings, match counters, resume cache
+#                      and PDF sandbox stats
+#
+# The catalog and matcher are loaded once at startup. Requests are handled on
+# threads; PDF parsing runs in a PdfSandbox (pdf_sandbox.py) so large or hostile
+# uploads don't hold up plain-text requests.
+import argparse
+import base64
+import binascii
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from instrumentation import METRICS, traced
+from pdf_sandbox import DEFAULT_MEMORY_MB, DEFAULT_TIMEOUT, PdfSandbox
+from resume_cache import get_resume_cache
+from skill_extractor import (
+    best_fit_roles,
+    compare_to_role,
+    extract_resume_report,
+    extract_skills_from_text,
+    generate_microplans,
+)
+from taxonomy import open_catalog
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+class ApiError(Exception):
+    def __init__(self, status, message, **extra):
+        super().__init__(message)
+        self.status = status
+        self.payload = dict({"error": message}, **extra)
+
+# ---------------------------
+# Application
+# ---------------------------
+class SkillService:
+    """Request handling independent of HTTP, so it can be driven directly in tests."""
+
+    def __init__(self, job_skills_csv="job_skills.csv", resources_json="resources.json", pdf_workers=2,
+                 pdf_timeout=DEFAULT_TIMEOUT, pdf_memory_mb=DEFAULT_MEMORY_MB, taxonomy=None):
+        self.job_skills_csv = job_skills_csv
+        self.resources_json = resources_json
+        self.taxonomy = taxonomy
+        self.catalog.matcher  # compile before the first request
+        # workers only parse; matching runs on the request thread with the shared matcher
+        self.pdf_pool = PdfSandbox(workers=pdf_workers, timeout=pdf_timeout, memory_mb=pdf_memory_mb)
+        for fut in [self.pdf_pool.submit(time.sleep, 0) for _ in range(pdf_workers)]:
+            fut.result()  # start the workers now instead of on the first upload
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.errors = 0
+
+    @property
+    def catalog(self):
+        # cheap stat() check; reloads only if the CSV/resources (or taxonomy) changed on disk
+        return open_catalog(self.job_skills_csv, self.resources_json, taxonomy=self.taxonomy)
+
+    def close(self):
+        self.pdf_pool.close()
+
+    def count(self, route, ok):
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+            if not ok:
+                self.errors += 1
+
+    # --- input -> skills ---
+    def skills_from(self, body):
+        return self.read_input(body)[0]
+
+    def read_input(self, body):
+        """(skills, pdf) for a request body, where pdf says how much of an
+        uploaded PDF was read (pages, total_pages, truncated, timed_out), else None."""
+        catalog = self.catalog
+        if isinstance(body.get("skills"), list):
+            return [str(s).strip() for s in body["skills"] if str(s).strip()], None
+        if body.get("pdf_base64"):
+            try:
+                data = base64.b64decode(body["pdf_base64"], validate=True)
+            except (binascii.Error, ValueError):
+                raise ApiError(400, "pdf_base64 is not valid base64")
+            # the filename only tells extract_resume_report to parse pdf_base64 as a PDF
+            report = extract_resume_report(data, catalog.matcher, filename="upload.pdf", sandbox=self.pdf_pool)
+            if not report["text"].strip():
+                if report["timed_out"]:
+                    raise ApiError(504, "PDF parsing timed out before any text was read")
+                if report["error"]:
+                    raise ApiError(422, f"could not read PDF: {report['error']}")
+            pdf = {field: report[field] for field in ("pages", "total_pages", "truncated", "timed_out")}
+            return list(report["skills"]), pdf
+        if isinstance(body.get("text"), str):
+            return extract_skills_from_text(body["text"], catalog.matcher), None
+        raise ApiError(400, "provide one of: text, skills, pdf_base64")
+
+    def _gap(self, skills, role):
+        res = compare_to_role(skills, role, catalog=self.catalog)
+        if "error" in res:
+            raise ApiError(404, res["error"], available_roles=res["available_roles"])
+        return res
+
+    # --- endpoints ---
+    def analyze(self, body):
+        if not body.get("role"):
+            raise ApiError(400, "role is required")
+        skills, pdf = self.read_input(body)
+        result = {"skills": skills, "role": body["role"], "gap": self._gap(skills, body["role"])}
+        if pdf is not None:
+            result["pdf"] = pdf
+        return result
+
+    def best_roles(self, body):
+        try:
+            k = int(body.get("k", 5))
+        except (TypeError, ValueError):
+            raise ApiError(400, "k must be an integer")
+        skills, pdf = self.read_input(body)
+        result = {"skills": skills, "roles": best_fit_roles(skills, k=max(k, 1), catalog=self.catalog)}
+        if pdf is not None:
+            result["pdf"] = pdf
+        return result
+
+    def microplan(self, body):
+        if isinstance(body.get("skills"), list) and not body.get("role"):
+            missing = body["skills"]
+        elif body.get("role"):
+            missing = self._gap(self.skills_from(body), body["role"])["missing"]
+        else:
+            raise ApiError(400, "provide skills, or role plus text/skills/pdf_base64")
+        return {"plans": generate_microplans(missing)}
+
+    def health(self):
+        catalog = self.catalog
+        return {"status": "ok", "catalog_version": catalog.version, "roles": len(catalog.roles),
+                "vocabulary": len(catalog.vocabulary), "uptime_s": round(time.time() - self.started, 1)}
+
+    def metrics(self):
+        with self._lock:
+            requests = dict(self.requests)
+            errors = self.errors
+        return {"requests": requests, "errors": errors, "stages": METRICS.snapshot(),
+                "counters": METRICS.counters(), "resume_cache": get_resume_cache().stats(),
+                "pdf_sandbox": self.pdf_pool.stats()}
+
+    POST_ROUTES = {"/analyze": "analyze", "/best-roles": "best_roles", "/microplan": "microplan"}
+    GET_ROUTES = {"/health": "health", "/metrics": "metrics"}
+
+    def handle(self, method, path, body=None):
+        """Dispatch a request; returns (status, payload)."""
+        routes = self.POST_ROUTES if method == "POST" else self.GET_ROUTES
+        name = routes.get(path.split("?", 1)[0].rstrip("/") or "/")
+        if name is None:
+            self.count("unknown_route", False)
+            return 404, {"error": f"no route for {method} {path}"}
+        try:
+            with traced(name):
+                payload = getattr(self, name)(body or {}) if method == "POST" else getattr(self, name)()
+        except ApiError as e:
+            self.count(name, False)
+            return e.status, e.payload
+        except Exception as e:
+            self.count(name, False)
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+        self.count(name, True)
+        return 200, payload
+
+# ---------------------------
+# HTTP glue
+# ---------------------------
+class _Handler(BaseHTTPRequestHandler):
+    service = None  # set by make_server
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._send(*self.service.handle("GET", self.path))
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # rfile.read(-1) would wait for the client to close; the body can't be framed
+            self.close_connection = True
+            return self._send(400, {"error": "Content-Length must be a non-negative integer"})
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            return self._send(413, {"error": f"body larger than {MAX_BODY_BYTES} bytes"})
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send(400, {"error": "body must be JSON"})
+        if not isinstance(body, dict):
+            return self._send(400, {"error": "body must be a JSON object"})
+        self._send(*self.service.handle("POST", self.path, body))
+
+    def log_message(self, fmt, *args):
+        pass  # request timings go through instrumentation instead
+
+def make_server(host="127.0.0.1", port=8080, service=None):
+    """Build (but don't start) a ThreadingHTTPServer; port 0 picks a free port."""
+    handler = type("Handler", (_Handler,), {"service": service or SkillService()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve skill gap analysis over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--pdf-workers", type=int, default=2, help="processes for PDF parsing")
+    parser.add_argument("--pdf-timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds allowed per PDF")
+    parser.add_argument("--pdf-memory-mb", type=int, default=DEFAULT_MEMORY_MB, help="address-space cap per PDF worker")
+    parser.add_argument("--job-skills", default="job_skills.csv")
+    parser.add_argument("--resources", default="resources.json")
+    parser.add_argument("--taxonomy", metavar="FILE", help="read roles and skills from a .tax file (see taxonomy.py)")
+    args = parser.parse_args(argv)
+
+    service = SkillService(args.job_skills, args.resources, args.pdf_workers,
+                           pdf_timeout=args.pdf_timeout, pdf_memory_mb=args.pdf_memory_mb, taxonomy=args.taxonomy)
+    server = make_server(args.host, args.port, service)
+    print(f"SkillBridge service on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
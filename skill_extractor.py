@@ -1,15 +1,27 @@
 # skill_extractor.py
 import re
+import csv
 import json
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-import pandas as pd
-import pdfplumber
-from difflib import get_close_matches
+from difflib import SequenceMatcher
+from fileio import atomic_write
+from resume_cache import content_key, get_resume_cache
+from instrumentation import count, span
+
+# pandas, numpy and pdfplumber are imported where they are first needed, so that
+# importing this module (and loading a catalog snapshot) stays fast.
 
 # ---------------------------
 # CSV loader that tolerates messy headers
 # ---------------------------
 def load_job_skills(job_skills_csv="job_skills.csv"):
+    import pandas as pd
     df = pd.read_csv(job_skills_csv, dtype=str)
     # fix common problem: header combined into one string "role,skills"
     if 'role,skills' in df.columns:
@@ -30,36 +42,392 @@ def load_job_skills(job_skills_csv="job_skills.csv"):
 # ---------------------------
 # Build vocabulary from CSV + resources.json
 # ---------------------------
-def build_skill_vocabulary(job_skills_csv="job_skills.csv", resources_json="resources.json"):
-    df = load_job_skills(job_skills_csv)
-    skills = set()
-    for s in df['skills'].dropna():
-        parts = [x.strip() for x in re.split(r'[;,]', str(s))]
-        skills.update(parts)
+def _split_skills(s):
+    return [x.strip() for x in re.split(r'[;,]', str(s))]
+
+def _load_resources(resources_json):
     try:
-        with open(resources_json, 'r', encoding='utf-8') as f:
-            res = json.load(f)
-        skills.update(res.keys())
+        with span("resources_load"), open(resources_json, 'r', encoding='utf-8') as f:
+            return json.load(f)
     except Exception:
-        pass
+        return {}
+
+def _load_aliases(aliases_json):
+    """{canonical skill: [variant, ...]} from aliases.json; {} if missing or malformed."""
+    try:
+        with span("aliases_load"), open(aliases_json, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {str(k): [str(v) for v in vs] for k, vs in data.items() if isinstance(vs, list)}
+
+def _vocabulary_from(df, resources):
+    skills = set()
+    for s in df['skills'].dropna():
+        skills.update(_split_skills(s))
+    skills.update(resources.keys())
     # normalize
-    skills = sorted({s for s in skills if s and isinstance(s, str)})
-    return skills
+    return sorted({s for s in skills if s and isinstance(s, str)})
+
+def build_skill_vocabulary(job_skills_csv="job_skills.csv", resources_json="resources.json"):
+    df = load_job_skills(job_skills_csv)
+    return _vocabulary_from(df, _load_resources(resources_json))
 
 # ---------------------------
-# Text extraction helpers
+# Process-wide catalog: roles, skills, frequencies and resources parsed once
 # ---------------------------
-def extract_text_from_pdf(path):
-    text = ""
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def _file_digest(path):
     try:
-        with pdfplumber.open(path) as pdf:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+class SkillCatalog:
+    """Everything derived from job_skills.csv, resources.json and aliases.json.
+
+    Build it through ``get_catalog`` so every caller in the process shares one
+    instance, reloaded only when the source files change.
+    """
+
+    def __init__(self, job_skills_csv="job_skills.csv", resources_json="resources.json",
+                 aliases_json="aliases.json"):
+        self.job_skills_csv = str(job_skills_csv)
+        self.resources_json = str(resources_json)
+        self.aliases_json = str(aliases_json)
+        self.signature = tuple(_file_signature(p) for p in self.sources())
+        self.digest = tuple(_file_digest(p) for p in self.sources())
+        self.version = hashlib.sha256(repr(self.digest).encode('utf-8')).hexdigest()[:16]
+        df = load_job_skills(self.job_skills_csv)
+        self.roles = df['role'].tolist()
+        # role.lower() -> (role, required skills); first row wins, like the old df lookup
+        self.role_skills = {}
+        for role, slist in zip(df['role'], df['skills']):
+            self.role_skills.setdefault(role.lower(), (role, _split_skills(slist)))
+        # how many roles list each skill (lower count -> more niche -> higher priority)
+        self.skill_counts = {}
+        for slist in df['skills'].dropna():
+            for s in _split_skills(slist):
+                self.skill_counts[s] = self.skill_counts.get(s, 0) + 1
+        self.resources = _load_resources(self.resources_json)
+        self.vocabulary = _vocabulary_from(df, self.resources)
+        self.aliases = _load_aliases(self.aliases_json)
+
+    def sources(self):
+        return (self.job_skills_csv, self.resources_json, self.aliases_json)
+
+    @property
+    def matcher(self):
+        return get_skill_matcher(self.vocabulary, self.aliases)
+
+    @property
+    def role_matrix(self):
+        matrix = self.__dict__.get('_role_matrix')
+        if matrix is None:
+            matrix = self._role_matrix = RoleSkillMatrix(self)
+        return matrix
+
+    def required_skills(self, role_name):
+        """Return (role, required skills) for ``role_name`` (case-insensitive), or None."""
+        return self.role_skills.get(role_name.lower())
+
+    def is_stale(self):
+        signature = tuple(_file_signature(p) for p in self.sources())
+        if signature == self.signature:
+            return False
+        # mtime/size changed: only a content change forces a rebuild
+        digest = tuple(_file_digest(p) for p in self.sources())
+        if digest == self.digest:
+            self.signature = signature
+            return False
+        return True
+
+class RoleSkillMatrix:
+    """Sparse role x skill incidence matrix (CSR-style numpy arrays) over
+    interned skill ids, for scoring every role against a skill set at once."""
+
+    def __init__(self, catalog):
+        import numpy as np
+        self.roles = []
+        self.required = []
+        self.skill_ids = {}
+        rows, cols = [], []
+        for r, (role, required) in enumerate(catalog.role_skills.values()):
+            self.roles.append(role)
+            self.required.append(required)
+            for s in required:
+                rows.append(r)
+                cols.append(self.skill_ids.setdefault(s, len(self.skill_ids)))
+        self.entry_role = np.asarray(rows, dtype=np.int32)
+        self.entry_skill = np.asarray(cols, dtype=np.int32)
+        # rarity weight: skills listed by fewer roles count more, as in compare_to_role's priority
+        counts = np.ones(len(self.skill_ids), dtype=np.float64)
+        for s, i in self.skill_ids.items():
+            counts[i] = max(catalog.skill_counts.get(s, 1), 1)
+        self.skill_weight = 1.0 / counts
+        n_roles = len(self.roles)
+        self.role_size = np.bincount(self.entry_role, minlength=n_roles).astype(np.float64)
+        self.role_weight = np.bincount(self.entry_role, weights=self.skill_weight[self.entry_skill],
+                                       minlength=n_roles)
+
+    def score(self, user_skills):
+        """Return (coverage, weighted coverage) arrays with one value per role."""
+        import numpy as np
+        mask = np.zeros(len(self.skill_ids), dtype=bool)
+        ids = [self.skill_ids[s] for s in set(user_skills) if s in self.skill_ids]
+        mask[ids] = True
+        hit = mask[self.entry_skill]
+        n_roles = len(self.roles)
+        matched = np.bincount(self.entry_role, weights=hit, minlength=n_roles)
+        matched_weight = np.bincount(self.entry_role, weights=hit * self.skill_weight[self.entry_skill],
+                                     minlength=n_roles)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            coverage = np.where(self.role_size > 0, matched / self.role_size, 0.0)
+            weighted = np.where(self.role_weight > 0, matched_weight / self.role_weight, 0.0)
+        return coverage, weighted
+
+    def top_roles(self, user_skills, k=5):
+        """Indices of the k best-covered roles: weighted coverage, then plain
+        coverage, then catalog order."""
+        import numpy as np
+        coverage, weighted = self.score(user_skills)
+        order = np.lexsort((np.arange(len(self.roles)), -coverage, -weighted))
+        return order[:k], coverage, weighted
+
+# ---------------------------
+# Precompiled catalog snapshot (built by build_snapshot.py)
+# ---------------------------
+SNAPSHOT_MAGIC = b"SKILLBRIDGE-CATALOG\n"
+SNAPSHOT_FORMAT = 3
+_SNAPSHOT_FIELDS = ("roles", "role_skills", "skill_counts", "resources", "vocabulary", "aliases")
+
+def default_snapshot_path(job_skills_csv="job_skills.csv"):
+    return os.environ.get("SKILLBRIDGE_SNAPSHOT") or str(Path(job_skills_csv).with_suffix(".snapshot"))
+
+def write_catalog_snapshot(job_skills_csv="job_skills.csv", resources_json="resources.json", path=None,
+                           aliases_json="aliases.json"):
+    """Parse the sources once and write the catalog's fields to ``path`` as JSON."""
+    path = path or default_snapshot_path(job_skills_csv)
+    catalog = SkillCatalog(job_skills_csv, resources_json, aliases_json)
+    state = {f: getattr(catalog, f) for f in _SNAPSHOT_FIELDS}
+    state.update(format=SNAPSHOT_FORMAT, digest=catalog.digest, version=catalog.version)
+    with atomic_write(path, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(json.dumps(state, ensure_ascii=False).encode('utf-8'))
+    return path
+
+def load_catalog_snapshot(path, job_skills_csv="job_skills.csv", resources_json="resources.json",
+                          aliases_json="aliases.json"):
+    """Catalog from a snapshot, or None if it is missing, of another format
+    version, or built from different source files than the current ones.
+    Snapshots are plain JSON data; the matcher is compiled again on first use."""
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                return None
+            state = json.loads(f.read().decode('utf-8'))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get("format") != SNAPSHOT_FORMAT:
+        return None
+    catalog = SkillCatalog.__new__(SkillCatalog)
+    catalog.job_skills_csv = str(job_skills_csv)
+    catalog.resources_json = str(resources_json)
+    catalog.aliases_json = str(aliases_json)
+    catalog.signature = tuple(_file_signature(p) for p in catalog.sources())
+    catalog.digest = tuple(_file_digest(p) for p in catalog.sources())
+    if catalog.digest != tuple(state.get("digest") or ()):
+        return None
+    catalog.version = state["version"]
+    for f in _SNAPSHOT_FIELDS:
+        setattr(catalog, f, state[f])
+    # JSON has no tuples
+    catalog.role_skills = {k: (role, skills) for k, (role, skills) in catalog.role_skills.items()}
+    return catalog
+
+_CATALOGS = {}
+_CATALOGS_LOCK = threading.Lock()
+
+def get_catalog(job_skills_csv="job_skills.csv", resources_json="resources.json", aliases_json="aliases.json"):
+    """Return the shared SkillCatalog for these files, rebuilding it if they changed.
+
+    A matching snapshot (see ``default_snapshot_path``) is loaded instead of
+    parsing the CSV when one exists.
+    """
+    key = tuple(os.path.abspath(str(p)) for p in (job_skills_csv, resources_json, aliases_json))
+    with _CATALOGS_LOCK:
+        catalog = _CATALOGS.get(key)
+        if catalog is None or catalog.is_stale():
+            with span("catalog_load"):
+                catalog = load_catalog_snapshot(default_snapshot_path(job_skills_csv), job_skills_csv,
+                                                resources_json, aliases_json)
+                if catalog is None:
+                    catalog = SkillCatalog(job_skills_csv, resources_json, aliases_json)
+            _CATALOGS[key] = catalog
+        return catalog
+
+# ---------------------------
+# Text extraction helpers
+# ---------------------------
+def _is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+def _pdf_input(source):
+    """What pdfplumber.open should get: paths and file objects as they are,
+    bytes wrapped in a BytesIO (which shares a bytes object rather than copying it)."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return source
+
+def _read_all(source):
+    """The whole content of an in-memory source as bytes (or the memoryview given)."""
+    if isinstance(source, (bytes, memoryview)):
+        return source
+    if isinstance(source, bytearray):
+        return bytes(source)
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()  # BytesIO / Streamlit UploadedFile: no copy
+    source.seek(0)
+    return source.read()
+
+def _extract_page_range(source, start, stop):
+    # runs in a worker process for parallel extraction; source is a path or the PDF's bytes
+    import pdfplumber
+    texts = []
+    with pdfplumber.open(_pdf_input(source)) as pdf:
+        for p in pdf.pages[start:stop]:
+            texts.append(p.extract_text() or "")
+            p.close()
+    return texts
+
+# one process pool shared by every parallel PDF parse; spawned, so it can be
+# started safely from threaded callers
+_page_pool = None
+_page_pool_workers = 0
+_page_pool_lock = threading.Lock()
+
+def _get_page_pool(workers, broken=None):
+    """The shared pool, sized for ``workers``. Pass the pool that raised
+    BrokenProcessPool as ``broken`` to replace it; callers that hit the same
+    failure together replace it only once."""
+    global _page_pool, _page_pool_workers
+    with _page_pool_lock:
+        if _page_pool is None or _page_pool_workers != workers or _page_pool is broken:
+            if _page_pool is not None:
+                _page_pool.shutdown(wait=False)
+            import multiprocessing
+            _page_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _page_pool_workers = workers
+        return _page_pool
+
+def _within_budget(pages, chars, max_pages, max_chars):
+    return (max_pages is None or pages < max_pages) and (max_chars is None or chars < max_chars)
+
+def iter_pdf_pages(path, max_pages=None, max_chars=None, workers=None, chunk_pages=4, stats=None):
+    """Yield the text of each non-empty PDF page, in order, as it is parsed.
+
+    ``path`` may also be the PDF's bytes, a memoryview or a binary file
+    object. Stops after ``max_pages`` pages or once ``max_chars`` characters
+    have been yielded. With ``workers`` > 1, page ranges of ``chunk_pages``
+    are parsed in a shared process pool, a few ranges ahead of the pages
+    being consumed.
+    Parse errors are raised to the caller. If ``stats`` is a dict, its pages,
+    total_pages and truncated entries are kept up to date.
+    """
+    import pdfplumber
+    stats = {} if stats is None else stats
+    stats.update(pages=0, total_pages=None, truncated=False)
+    pages = chars = 0
+    if not workers or workers <= 1:
+        with pdfplumber.open(_pdf_input(path)) as pdf:
+            stats["total_pages"] = len(pdf.pages)
             for p in pdf.pages:
-                t = p.extract_text()
+                if not _within_budget(pages, chars, max_pages, max_chars):
+                    stats["truncated"] = True
+                    return
+                with span("pdf_parse"):
+                    t = p.extract_text()
+                    p.close()  # drop the page's cached layout objects
+                pages += 1
+                stats["pages"] = pages
                 if t:
-                    text += t + "\n"
+                    chars += len(t)
+                    yield t
+        return
+    if _is_path(path):
+        path = os.fspath(path)
+    else:
+        path = _read_all(path)
+        if isinstance(path, memoryview):
+            path = path.tobytes()  # pickled for the workers either way
+    with pdfplumber.open(_pdf_input(path)) as pdf:
+        total = stats["total_pages"] = len(pdf.pages)
+    if max_pages is not None and total > max_pages:
+        total = max_pages
+        stats["truncated"] = True
+    pool = _get_page_pool(workers)
+    next_start = 0
+    in_flight = []  # (first page, future), in page order
+    retried = False
+    try:
+        while True:
+            try:
+                # ranges are requested as earlier ones are consumed, and not at all
+                # once the text read so far is over budget
+                while len(in_flight) < workers and next_start < total and \
+                        _within_budget(pages, chars, max_pages, max_chars):
+                    stop = min(next_start + chunk_pages, total)
+                    in_flight.append((next_start, pool.submit(_extract_page_range, path, next_start, stop)))
+                    next_start = stop
+                if not in_flight:
+                    if next_start < total:
+                        stats["truncated"] = True  # stopped asking: over the character budget
+                    break
+                with span("pdf_parse"):
+                    texts = in_flight[0][1].result()
+            except BrokenProcessPool:
+                # a worker died, maybe on another caller's document: replace the
+                # shared pool and ask for the outstanding ranges once more
+                if retried:
+                    raise
+                retried = True
+                pool = _get_page_pool(workers, broken=pool)
+                in_flight = [(start, pool.submit(_extract_page_range, path, start, min(start + chunk_pages, total)))
+                             for start, _ in in_flight]
+                continue
+            in_flight.pop(0)
+            for t in texts:
+                if not _within_budget(pages, chars, max_pages, max_chars):
+                    stats["truncated"] = True
+                    return
+                pages += 1
+                stats["pages"] = pages
+                if t:
+                    chars += len(t)
+                    yield t
+    finally:
+        for _, fut in in_flight:
+            fut.cancel()
+
+def extract_text_from_pdf(path, max_pages=None, max_chars=None, workers=None):
+    """Text of a PDF given as a path, bytes or binary file object ("" on errors)."""
+    parts = []
+    try:
+        for t in iter_pdf_pages(path, max_pages, max_chars, workers):
+            parts.append(t)
+            parts.append("\n")
     except Exception:
         pass
-    return text
+    return "".join(parts)
 
 def extract_text_from_txt(path):
     try:
@@ -67,73 +435,598 @@ def extract_text_from_txt(path):
     except Exception:
         return ""
 
+# ---------------------------
+# Compiled matcher: Aho-Corasick exact pass + segment-indexed fuzzy lookup
+# ---------------------------
+_WORD_CHAR = re.compile(r'\w')
+
+def _is_word_char(text, i):
+    # same notion of "word character" that re's \b uses; out of range counts as non-word
+    return 0 <= i < len(text) and _WORD_CHAR.match(text[i]) is not None
+
+def _at_boundary(text, i):
+    return _is_word_char(text, i - 1) != _is_word_char(text, i)
+
+FUZZY_MEMO_SIZE = 200_000
+
+_ALIAS_SEPARATORS = re.compile(r'[\s_\-/]+')
+
+def normalize_alias(s):
+    """Lookup form of a skill spelling: lowercase, with runs of spaces, '-', '_'
+    and '/' folded to one space and trailing dots dropped ("Scikit-Learn",
+    "scikit learn" and "scikit_learn." all give "scikit learn")."""
+    return _ALIAS_SEPARATORS.sub(' ', s.lower()).rstrip('.').strip()
+
+def _segments(length, n):
+    """(start, stop) of ``n`` near-equal pieces of a key of ``length``, longer ones last."""
+    base, extra = divmod(length, n)
+    bounds, start = [], 0
+    for j in range(n):
+        stop = start + base + (j >= n - extra)
+        bounds.append((start, stop))
+        start = stop
+    return bounds
+
+class SkillMatcher:
+    """Compiled once per vocabulary; finds every skill whose lowercased form
+    occurs in the text between word boundaries, in a single pass, resolves
+    known spellings and aliases with one dict lookup, and answers
+    difflib-style fuzzy lookups without scoring the whole vocabulary.
+
+    ``aliases`` maps canonical vocabulary entries to variant spellings
+    (``{"Kubernetes": ["k8s"]}``); entries not in the vocabulary are ignored.
+    """
+
+    def __init__(self, vocabulary, aliases=None):
+        self.vocabulary = list(vocabulary)
+        self.alias_key = _alias_key(aliases)
+        # identifies vocabulary + aliases in cache keys
+        self.version = hashlib.sha256(("\x1f".join(self.vocabulary) + "\x1e" + self.alias_key)
+                                      .encode('utf-8')).hexdigest()[:16]
+        # lowercase form -> original spellings (vocab may hold e.g. both "MATLAB" and "Matlab")
+        self.by_lower = {}
+        for v in self.vocabulary:
+            self.by_lower.setdefault(v.lower(), []).append(v)
+        # normalized spelling -> canonical entry: the vocabulary's own separator
+        # variants ("ci cd" -> "CI/CD") first, then the alias table
+        self.aliases = {}
+        for key in self.by_lower:
+            self.aliases.setdefault(normalize_alias(key), self.canonical(key))
+        for target, variants in (aliases or {}).items():
+            target = self.canonical(target.lower())
+            if target is None:
+                continue
+            for v in variants:
+                n = normalize_alias(v)
+                if n:
+                    self.aliases.setdefault(n, target)
+        # goto / fail / output tables of the automaton, node 0 is the root
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for key in self.by_lower:
+            self._add(key)
+        self._link()
+        # fuzzy index: lowercase keys bucketed by length; segment indexes per
+        # (length, pieces) are built by _segment_index on first use
+        self._keys = list(self.by_lower)
+        self._by_len = {}
+        for i, key in enumerate(self._keys):
+            self._by_len.setdefault(len(key), []).append(i)
+        self._lengths = sorted(self._by_len)
+        self._segment_indexes = {}
+        self._segment_lock = threading.Lock()
+        # (word, cutoff) -> fuzzy() answer, so words seen in earlier documents are
+        # not scored again; cleared when full
+        self.fuzzy_memo = {}
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['fuzzy_memo'] = {}
+        state['_segment_indexes'] = {}
+        del state['_segment_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._segment_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.vocabulary)
+
+    def canonical(self, key):
+        """Original spelling for a lowercase key (first one in vocabulary order)."""
+        spellings = self.by_lower.get(key)
+        return spellings[0] if spellings else None
+
+    def _add(self, key):
+        node = 0
+        for ch in key:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(key)
+
+    def _link(self):
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for ch, nxt in self._goto[node].items():
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+                queue.append(nxt)
+
+    def remember(self, word, cutoff, key):
+        if len(self.fuzzy_memo) >= FUZZY_MEMO_SIZE:
+            self.fuzzy_memo.clear()
+        self.fuzzy_memo[(word, cutoff)] = key
+
+    def resolve(self, word):
+        """Canonical entry for a lowercase candidate that is a vocabulary key or
+        a known spelling/alias of one, else None. Never fuzzy."""
+        spellings = self.by_lower.get(word)
+        if spellings:
+            return spellings[0]
+        return self.aliases.get(normalize_alias(word))
+
+    def exact(self, text_lower):
+        """Return the set of vocabulary entries matched exactly in ``text_lower``."""
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = set()
+        node = 0
+        for i, ch in enumerate(text_lower):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for key in out[node]:
+                if key in hits:
+                    continue
+                end = i + 1
+                if _at_boundary(text_lower, end - len(key)) and _at_boundary(text_lower, end):
+                    hits.add(key)
+        found = set()
+        for key in hits:
+            found.update(self.by_lower[key])
+        return found
+
+    def _segment_index(self, length, pieces):
+        """(piece bounds, {(piece number, text): [key ids]}) over the keys of
+        ``length``, each cut into ``pieces`` near-equal pieces."""
+        index = self._segment_indexes.get((length, pieces))
+        if index is None:
+            with self._segment_lock:
+                index = self._segment_indexes.get((length, pieces))
+                if index is None:
+                    bounds = _segments(length, pieces)
+                    table = {}
+                    for i in self._by_len[length]:
+                        key = self._keys[i]
+                        for j, (start, stop) in enumerate(bounds):
+                            table.setdefault((j, key[start:stop]), []).append(i)
+                    index = self._segment_indexes[(length, pieces)] = (bounds, table)
+        return index
+
+    def fuzzy(self, word, cutoff=0.85):
+        """Best lowercase key for ``word``, same answer as
+        ``get_close_matches(word, keys, n=1, cutoff=cutoff)``, or None.
+
+        Keys are only scored when they can still reach ``cutoff``. Their
+        length must pass difflib's real_quick_ratio bound. Reaching the cutoff
+        needs M matching characters, so key and word differ by at most
+        D = la + lb - 2M inserted or deleted characters. Each of those breaks
+        at most one piece of a key cut into D + 2 pieces, so two pieces occur
+        unchanged in ``word``, each shifted by at most lb - M to the left or
+        la - M to the right. Only keys with two such pieces are scored.
+        """
+        if not 0.0 <= cutoff <= 1.0:
+            raise ValueError("cutoff must be in [0.0, 1.0]: %r" % (cutoff,))
+        if word in self.by_lower:
+            # only an identical key scores 1.0
+            return word
+        la = len(word)
+        keys = self._keys
+        pool = set()
+        for lb in self._lengths:
+            total = la + lb
+            if 2.0 * min(la, lb) / total < cutoff:
+                continue
+            m = 0
+            while 2.0 * m / total < cutoff:
+                m += 1
+            pieces = total - 2 * m + 2
+            if pieces > lb:
+                # pieces would be empty: every key of this length is a candidate
+                pool.update(self._by_len[lb])
+                continue
+            bounds, table = self._segment_index(lb, pieces)
+            # keys seen with one piece so far, and those seen with two
+            once = set()
+            for j, (start, stop) in enumerate(bounds):
+                size = stop - start
+                found = set()
+                for p in range(max(0, start - (lb - m)), min(la - size, start + (la - m)) + 1):
+                    ids = table.get((j, word[p:p + size]))
+                    if ids:
+                        found.update(ids)
+                if found:
+                    pool |= found & once
+                    once |= found
+        best = None
+        sm = SequenceMatcher()
+        sm.set_seq2(word)
+        for i in pool:
+            key = keys[i]
+            sm.set_seq1(key)
+            if sm.real_quick_ratio() >= cutoff and sm.quick_ratio() >= cutoff:
+                score = sm.ratio()
+                if score >= cutoff and (best is None or (score, key) > best):
+                    best = (score, key)
+        return best[1] if best else None
+
+def _alias_key(aliases):
+    return json.dumps(aliases, sort_keys=True) if aliases else ""
+
+_MATCHER_CACHE = {}
+_MATCHER_CACHE_SIZE = 8
+
+def _remember_matcher(matcher):
+    key = (tuple(matcher.vocabulary), matcher.alias_key)
+    if key not in _MATCHER_CACHE and len(_MATCHER_CACHE) >= _MATCHER_CACHE_SIZE:
+        _MATCHER_CACHE.pop(next(iter(_MATCHER_CACHE)))
+    _MATCHER_CACHE[key] = matcher
+
+def get_skill_matcher(vocabulary, aliases=None):
+    """Return a (cached) SkillMatcher for ``vocabulary`` and ``aliases``."""
+    key = (tuple(vocabulary), _alias_key(aliases))
+    matcher = _MATCHER_CACHE.get(key)
+    if matcher is None:
+        matcher = SkillMatcher(key[0], aliases)
+        _remember_matcher(matcher)
+    return matcher
+
+def _as_matcher(vocabulary):
+    """The SkillMatcher for a ``vocabulary`` argument: a matcher as is, a list of
+    skills compiled (and cached), or None for the catalog's matcher with its aliases."""
+    if vocabulary is None:
+        return get_catalog().matcher
+    if isinstance(vocabulary, SkillMatcher):
+        return vocabulary
+    return get_skill_matcher(vocabulary)
+
 # ---------------------------
 # Skill matching: exact + fuzzy
 # ---------------------------
-def extract_skills_from_text(text, vocabulary, fuzzy_cutoff=0.85):
-    if not text or not vocabulary:
+_CANDIDATE_WORD = re.compile(r"[A-Za-z0-9\+\#\.\-]+")
+
+class SkillScanner:
+    """Incremental skill matching: feed text chunk by chunk (e.g. PDF pages as
+    they are parsed) and read the result at the end.
+
+    Chunks are treated as if joined with newlines, so feeding the pages of a
+    document finds the same skills as matching the whole text at once; the
+    last words of a chunk still form 2- and 3-word fuzzy candidates with the
+    first words of the next one.
+
+    ``stats`` counts candidate n-grams and how they were settled: ``exact``
+    (a vocabulary key), ``alias`` (a spelling variant or alias of one),
+    ``memo`` (fuzzy answer already known from earlier text), or sent to
+    ``fuzzy``.
+    """
+
+    def __init__(self, vocabulary=None, fuzzy_cutoff=0.85):
+        self.matcher = _as_matcher(vocabulary)
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.found = set()
+        self._tried = set()
+        self._tail = []
+        self.has_text = False
+        self.stats = {"candidates": 0, "exact": 0, "alias": 0, "memo": 0, "fuzzy": 0}
+
+    def feed(self, text):
+        if not text:
+            return
+        if text.strip():
+            self.has_text = True
+        matcher = self.matcher
+        # candidate ngrams, including ones spanning the previous chunk
+        words = self._tail + _CANDIDATE_WORD.findall(text)
+        first_new = len(self._tail)
+        candidates = set()
+        for i in range(len(words)):
+            if i >= first_new:
+                candidates.add(words[i])
+            if i+1 < len(words) and i+1 >= first_new:
+                candidates.add(words[i] + " " + words[i+1])
+            if i+2 < len(words) and i+2 >= first_new:
+                candidates.add(words[i] + " " + words[i+1] + " " + words[i+2])
+        self._tail = words[-2:]
+        candidates = {c.lower() for c in candidates} - self._tried
+        self._tried |= candidates
+        # exact matches, then hash lookups of the candidates' normalized forms
+        unresolved = []
+        exact = alias = memo = 0
+        cutoff = self.fuzzy_cutoff
+        with span("exact_match"):
+            self.found |= matcher.exact(text.lower())
+            for cand in candidates:
+                skill = matcher.resolve(cand)
+                if skill is not None:
+                    self.found.add(skill)
+                    if cand in matcher.by_lower:
+                        exact += 1
+                    else:
+                        alias += 1
+                    continue
+                # False: never looked up (None is a remembered miss)
+                matched_lower = matcher.fuzzy_memo.get((cand, cutoff), False)
+                if matched_lower is False:
+                    unresolved.append(cand)
+                    continue
+                memo += 1
+                if matched_lower:
+                    self.found.add(matcher.canonical(matched_lower))
+        # fuzzy fallback for whatever is left
+        with span("fuzzy_match"):
+            for cand in unresolved:
+                matched_lower = matcher.fuzzy(cand, cutoff)
+                matcher.remember(cand, cutoff, matched_lower)
+                if matched_lower:
+                    # map back to original vocab casing
+                    self.found.add(matcher.canonical(matched_lower))
+        for name, n in (("candidates", len(candidates)), ("exact", exact), ("alias", alias),
+                        ("memo", memo), ("fuzzy", len(unresolved))):
+            self.stats[name] += n
+            count("match_" + name, n)
+
+    def result(self):
+        return sorted(self.found)
+
+def extract_skills_from_text(text, vocabulary=None, fuzzy_cutoff=0.85):
+    if not text:
         return []
-    text_lower = text.lower()
-    found = set()
-    # exact matches
-    for skill in vocabulary:
-        pattern = r'\b' + re.escape(skill.lower()) + r'\b'
-        if re.search(pattern, text_lower):
-            found.add(skill)
-    # fuzzy fallback: candidate ngrams
-    words = re.findall(r"[A-Za-z0-9\+\#\.\-]+", text)
-    candidates = set()
-    for i in range(len(words)):
-        candidates.add(words[i])
-        if i+1 < len(words):
-            candidates.add(words[i] + " " + words[i+1])
-        if i+2 < len(words):
-            candidates.add(words[i] + " " + words[i+1] + " " + words[i+2])
-    lower_vocab = [v.lower() for v in vocabulary]
-    for cand in candidates:
-        matches = get_close_matches(cand.lower(), lower_vocab, n=1, cutoff=fuzzy_cutoff)
-        if matches:
-            matched_lower = matches[0]
-            # map back to original vocab casing
-            for v in vocabulary:
-                if v.lower() == matched_lower:
-                    found.add(v)
-                    break
-    return sorted(found)
+    matcher = _as_matcher(vocabulary)
+    if not matcher.vocabulary:
+        return []
+    scanner = SkillScanner(matcher, fuzzy_cutoff)
+    scanner.feed(text)
+    return scanner.result()
 
-def extract_skills_from_file(path, vocabulary=None):
-    if vocabulary is None:
-        vocabulary = build_skill_vocabulary()
-    path = str(path)
-    if path.lower().endswith('.pdf'):
-        text = extract_text_from_pdf(path)
+def _looks_like_pdf(data, filename=None):
+    if filename:
+        return str(filename).lower().endswith('.pdf')
+    return b"%PDF-" in bytes(data[:1024])
+
+def _text_from_bytes(data):
+    # same decoding as extract_text_from_txt, including newline translation
+    return bytes(data).decode('utf-8', errors='ignore').replace("\r\n", "\n").replace("\r", "\n")
+
+# how much of a PDF was read, kept with its cache entry
+_CACHED_PDF_FIELDS = ("pages", "total_pages", "truncated")
+
+def extract_resume_report(source, vocabulary=None, filename=None, max_pages=None, max_chars=None,
+                          workers=None, cache=None, sandbox=None):
+    """Extract a resume and say how it went.
+
+    ``source`` is a path, or the file's content as bytes, a memoryview or a
+    binary file object. A path is a PDF if it ends in ``.pdf``. In-memory
+    content is a PDF if ``filename`` says so or, without one, if it starts
+    like one. With ``sandbox`` (a pdf_sandbox.PdfSandbox), PDFs are parsed in
+    an isolated worker with time, memory and page limits.
+
+    Returns a dict with text, skills and cached, plus pages, total_pages and
+    truncated (reported for PDFs, also when served from the cache; else None),
+    timed_out, and error (None, or what cut the parse short). Results are cached by content and
+    vocabulary version in ``cache`` (default: the shared ResumeCache; False
+    bypasses it). Timed-out and failed parses are not cached.
+    """
+    report = {"text": "", "skills": [], "cached": False, "pages": None, "total_pages": None,
+              "truncated": None, "timed_out": False, "error": None}
+    matcher = _as_matcher(vocabulary)
+    if not matcher.vocabulary:
+        return report
+    if sandbox is not None:
+        # the sandbox's own limits apply, so they are part of the cache key
+        max_pages = sandbox.max_pages if max_pages is None else max_pages
+        max_chars = sandbox.max_chars if max_chars is None else max_chars
+    if _is_path(source):
+        filename = filename or str(source)
+        if cache is not False:
+            try:
+                source = Path(source).read_bytes()
+            except OSError as e:
+                report["error"] = f"{type(e).__name__}: {e}"
+                return report
     else:
-        text = extract_text_from_txt(path)
-    if not text.strip():
-        return []
-    return extract_skills_from_text(text, vocabulary)
+        source = _read_all(source)
+    key = None
+    if cache is not False:
+        cache = cache or get_resume_cache()
+        key = _resume_cache_key(source, matcher, max_pages, max_chars)
+        entry = cache.get(key)
+        if entry is not None:
+            report.update(text=entry["text"], skills=list(entry["skills"]), cached=True)
+            # entries written before these fields were kept leave them None
+            for field in _CACHED_PDF_FIELDS:
+                report[field] = entry.get(field)
+            return report
+    if not _looks_like_pdf(source, filename):
+        text = extract_text_from_txt(source) if _is_path(source) else _text_from_bytes(source)
+        report.update(text=text, skills=extract_skills_from_text(text, matcher) if text.strip() else [])
+    elif sandbox is not None:
+        parsed = sandbox.parse(source, max_pages, max_chars)
+        for field in ("pages", "total_pages", "truncated", "timed_out", "error"):
+            report[field] = parsed[field]
+        text = parsed["text"]
+        report.update(text=text, skills=extract_skills_from_text(text, matcher) if text.strip() else [])
+    else:
+        # match each page as soon as it is parsed
+        scanner = SkillScanner(matcher)
+        parts = []
+        parsed = {}
+        try:
+            for t in iter_pdf_pages(source, max_pages, max_chars, workers, stats=parsed):
+                parts.append(t + "\n")
+                scanner.feed(t)
+        except Exception as e:
+            report["error"] = f"{type(e).__name__}: {e}"
+            parsed["truncated"] = parsed.get("pages", 0) > 0
+        report.update(parsed)
+        report.update(text="".join(parts), skills=scanner.result() if scanner.has_text else [])
+    if key is not None and not report["timed_out"] and report["error"] is None:
+        cache.put(key, report["text"], report["skills"],
+                  **{field: report[field] for field in _CACHED_PDF_FIELDS})
+    return report
+
+def extract_resume(source, vocabulary=None, filename=None, max_pages=None, max_chars=None, workers=None,
+                   sandbox=None):
+    """Return (text, skills) for a resume, uncached (see extract_resume_report)."""
+    report = extract_resume_report(source, vocabulary, filename, max_pages, max_chars, workers,
+                                   cache=False, sandbox=sandbox)
+    return report["text"], report["skills"]
+
+def _resume_cache_key(data, matcher, max_pages=None, max_chars=None):
+    return content_key(data, matcher.version, max_pages, max_chars)
+
+def extract_skills_from_bytes(data, vocabulary=None, filename=None, max_pages=None, max_chars=None,
+                              workers=None, cache=None, sandbox=None):
+    """Skills found in a PDF/TXT resume held in memory: bytes, a memoryview or
+    a binary file object such as Streamlit's UploadedFile. Nothing is written
+    to disk. See extract_resume_report for the arguments and caching.
+    """
+    return extract_resume_report(data, vocabulary, filename, max_pages, max_chars, workers,
+                                 cache, sandbox)["skills"]
+
+def extract_skills_from_file(path, vocabulary=None, max_pages=None, max_chars=None, workers=None, cache=None,
+                             sandbox=None):
+    """Skills found in a PDF/TXT resume file (see extract_skills_from_bytes)."""
+    return extract_resume_report(str(path), vocabulary, None, max_pages, max_chars, workers,
+                                 cache, sandbox)["skills"]
+
+# ---------------------------
+# Skill weights per role, derived from job postings (built by postings.py)
+# ---------------------------
+DEFAULT_ROLE_WEIGHTS = os.environ.get("SKILLBRIDGE_ROLE_WEIGHTS", "role_weights.csv")
+
+def load_role_weights(path):
+    """{role.lower(): {skill: weight}} from a role,skill,weight CSV, where weight is
+    the share of the role's postings that ask for the skill."""
+    weights = {}
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            role, skill = (row.get("role") or "").strip(), (row.get("skill") or "").strip()
+            try:
+                weight = float(row.get("weight"))
+            except (TypeError, ValueError):
+                continue
+            if role and skill:
+                weights.setdefault(role.lower(), {})[skill] = weight
+    return weights
+
+_ROLE_WEIGHTS = {}
+_ROLE_WEIGHTS_LOCK = threading.Lock()
+
+def get_role_weights(path=None):
+    """Shared role weights table for ``path`` (default: $SKILLBRIDGE_ROLE_WEIGHTS or
+    role_weights.csv), reloaded when the file changes; {} when there is none."""
+    path = os.path.abspath(path or DEFAULT_ROLE_WEIGHTS)
+    signature = _file_signature(path)
+    with _ROLE_WEIGHTS_LOCK:
+        cached = _ROLE_WEIGHTS.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+    weights = {}
+    if signature is not None:
+        try:
+            with span("role_weights_load"):
+                weights = load_role_weights(path)
+        except (OSError, UnicodeDecodeError, csv.Error):
+            weights = {}
+    with _ROLE_WEIGHTS_LOCK:
+        _ROLE_WEIGHTS[path] = (signature, weights)
+    return weights
 
 # ---------------------------
 # Role comparison & prioritized missing skills
 # ---------------------------
-def compare_to_role(user_skills, role_name, job_skills_csv="job_skills.csv"):
-    df = load_job_skills(job_skills_csv)
-    row = df[df['role'].str.lower() == role_name.lower()]
-    if row.empty:
-        return {"error":"Role not found", "available_roles": df['role'].tolist()}
-    required = [s.strip() for s in re.split(r'[;,]', row.iloc[0]['skills'])]
+def compare_to_role(user_skills, role_name, job_skills_csv="job_skills.csv", catalog=None, role_weights=None):
+    """Required, matched and missing skills for ``role_name``. Missing skills come
+    most-wanted first when ``role_weights`` (default: ``get_role_weights()``) has
+    the role, rarest across roles first otherwise."""
+    with span("compare_to_role"):
+        if role_weights is None:
+            role_weights = get_role_weights()
+        return _compare_to_role(user_skills, role_name, job_skills_csv, catalog, role_weights)
+
+def _compare_to_role(user_skills, role_name, job_skills_csv, catalog, role_weights):
+    if catalog is None:
+        catalog = get_catalog(job_skills_csv)
+    entry = catalog.required_skills(role_name)
+    if entry is None:
+        return {"error":"Role not found", "available_roles": list(catalog.roles)}
+    required = list(entry[1])
+    user_skills = set(user_skills)
     matched = [s for s in required if s in user_skills]
     missing = [s for s in required if s not in user_skills]
-    # simple priority: missing sorted by frequency across roles (rare skills get higher priority)
-    # compute frequency across df
-    skill_counts = {}
-    for slist in df['skills'].dropna():
-        for s in [x.strip() for x in re.split(r'[;,]', slist)]:
-            skill_counts[s] = skill_counts.get(s, 0) + 1
-    # lower count -> more niche -> higher priority
-    missing_sorted = sorted(missing, key=lambda x: (skill_counts.get(x,0), required.index(x)))
+    # priority: how often postings for this role ask for the skill, when known; then
+    # frequency across roles (rare skills get higher priority)
+    weights = role_weights.get(role_name.lower(), {})
+    skill_counts = catalog.skill_counts
+    missing_sorted = sorted(missing, key=lambda x: (-weights.get(x, 0.0), skill_counts.get(x,0), required.index(x)))
     return {"required": required, "matched": matched, "missing": missing_sorted}
 
+def gaps_for_all_roles(user_skills, job_skills_csv="job_skills.csv", catalog=None, role_weights=None):
+    """``{role.lower(): compare_to_role result}`` for every role in the catalog,
+    so a UI can switch target roles without recomputing anything."""
+    if catalog is None:
+        catalog = get_catalog(job_skills_csv)
+    if role_weights is None:
+        role_weights = get_role_weights()
+    user_skills = set(user_skills)
+    gaps = {}
+    with span("gaps_all_roles"):
+        for role in catalog.roles:
+            key = role.lower()
+            if key not in gaps:
+                gaps[key] = _compare_to_role(user_skills, role, job_skills_csv, catalog, role_weights)
+    return gaps
+
+_background = None
+_background_lock = threading.Lock()
+
+def submit_gaps_for_all_roles(user_skills, job_skills_csv="job_skills.csv", catalog=None):
+    """Run ``gaps_for_all_roles`` on a shared background thread; returns a Future."""
+    global _background
+    with _background_lock:
+        if _background is None:
+            _background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gaps")
+    return _background.submit(gaps_for_all_roles, list(user_skills), job_skills_csv, catalog)
+
+def best_fit_roles(user_skills, k=5, job_skills_csv="job_skills.csv", catalog=None):
+    """Rank every role by how well ``user_skills`` cover it and return the top ``k``
+    as dicts with role, coverage, score (rarity-weighted coverage), matched and missing."""
+    if catalog is None:
+        catalog = get_catalog(job_skills_csv)
+    matrix = catalog.role_matrix
+    top, coverage, weighted = matrix.top_roles(user_skills, k)
+    results = []
+    for r in top:
+        gap = compare_to_role(user_skills, matrix.roles[r], catalog=catalog)
+        results.append({
+            "role": matrix.roles[r],
+            "coverage": round(float(coverage[r]), 4),
+            "score": round(float(weighted[r]), 4),
+            "matched": gap["matched"],
+            "missing": gap["missing"],
+        })
+    return results
+
 # ---------------------------
 # Generate deterministic 30-day micro learning plan (no external APIs)
 # ---------------------------
@@ -0,0 +1,569 @@
+# taxonomy.py — compact, memory-mapped skill taxonomy with append-only deltas
+#
+#   python taxonomy.py build --job-skills job_skills.csv -o skills.tax
+#   python taxonomy.py add-role skills.tax "Data Engineer" "Python,SQL,Spark,Airflow"
+#   python taxonomy.py add-skill skills.tax "dbt"
+#   python taxonomy.py compact skills.tax          # fold skills.tax.delta into the base file
+#   python taxonomy.py info skills.tax
+#
+# The base file holds interned skill ids (sorted string table), a lowercase
+# index, per-skill role counts and the role -> skill id lists. Readers mmap it,
+# so every worker process on a host shares the same page-cache pages instead of
+# holding its own copy of these tables and of the role matrix built over them.
+# The skill matcher is still compiled in each process. Role/skill changes are
+# appended to ``<file>.delta`` (JSON lines) and overlaid on open, without
+# rewriting the base.
+import argparse
+import contextlib
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: appends and compaction aren't serialized there
+    fcntl = None
+
+from fileio import atomic_write
+from skill_extractor import (
+    RoleSkillMatrix,
+    SkillMatcher,
+    _alias_key,
+    _load_aliases,
+    _load_resources,
+    _split_skills,
+    get_catalog,
+    load_job_skills,
+)
+
+MAGIC = b"SBTAXON\0"
+FORMAT = 1
+# magic, format, byte order (0 little / 1 big), n_skills, n_roles, n_entries
+_HEADER = struct.Struct("<8sIIIII")
+_SECTIONS = ("skill_offsets", "skill_blob", "lower_order", "lower_offsets", "lower_blob",
+             "skill_counts", "role_offsets", "role_blob", "role_lower_order",
+             "role_indptr", "role_indices")
+_TABLE = struct.Struct("<" + "QQ" * len(_SECTIONS))
+
+# ---------------------------
+# Building
+# ---------------------------
+def _string_table(strings):
+    offsets = array("Q", [0])
+    blob = bytearray()
+    for s in strings:
+        blob += s.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets.tobytes(), bytes(blob)
+
+def write_taxonomy(path, roles, extra_skills=()):
+    """Write a taxonomy file from ``roles`` — (role, [skills]) pairs, first
+    occurrence of a (case-insensitive) role name wins — plus ``extra_skills``."""
+    by_lower = {}
+    for role, skills in roles:
+        by_lower.setdefault(role.lower(), (role, [s for s in skills]))
+    role_list = list(by_lower.values())
+    vocab = set(extra_skills)
+    counts = {}
+    for _, skills in role_list:
+        vocab.update(skills)
+        for s in skills:
+            counts[s] = counts.get(s, 0) + 1
+    vocab = sorted({s for s in vocab if s and isinstance(s, str)})
+    ids = {s: i for i, s in enumerate(vocab)}
+
+    sections = {}
+    sections["skill_offsets"], sections["skill_blob"] = _string_table(vocab)
+    lower_order = sorted(range(len(vocab)), key=lambda i: (vocab[i].lower().encode("utf-8"), i))
+    sections["lower_order"] = array("I", lower_order).tobytes()
+    sections["lower_offsets"], sections["lower_blob"] = _string_table(vocab[i].lower() for i in lower_order)
+    sections["skill_counts"] = array("I", (counts.get(s, 0) for s in vocab)).tobytes()
+    sections["role_offsets"], sections["role_blob"] = _string_table(r for r, _ in role_list)
+    role_lower_order = sorted(range(len(role_list)), key=lambda i: (role_list[i][0].lower().encode("utf-8"), i))
+    sections["role_lower_order"] = array("I", role_lower_order).tobytes()
+    indptr = array("I", [0])
+    indices = array("I")
+    for _, skills in role_list:
+        # empty names (e.g. from "A,,B") are kept out of the vocabulary but stay in the role
+        indices.extend(ids.get(s, 0xFFFFFFFF) for s in skills)
+        indptr.append(len(indices))
+    sections["role_indptr"] = indptr.tobytes()
+    sections["role_indices"] = indices.tobytes()
+
+    body = bytearray()
+    table = []
+    start = _HEADER.size + _TABLE.size
+    for name in _SECTIONS:
+        pad = (-(start + len(body))) % 8
+        body += b"\0" * pad
+        table += [start + len(body), len(sections[name])]
+        body += sections[name]
+    with atomic_write(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT, 0 if sys.byteorder == "little" else 1,
+                             len(vocab), len(role_list), len(indices)))
+        f.write(_TABLE.pack(*table))
+        f.write(body)
+    return path
+
+def build_taxonomy(path, job_skills_csv="job_skills.csv", resources_json="resources.json"):
+    """Compile the role CSV (+ resources.json skill names) into a taxonomy file."""
+    df = load_job_skills(job_skills_csv)
+    roles = [(r, _split_skills(s)) for r, s in zip(df["role"], df["skills"])]
+    return write_taxonomy(path, roles, _load_resources(resources_json).keys())
+
+# ---------------------------
+# Deltas
+# ---------------------------
+def delta_path(path):
+    return f"{path}.delta"
+
+@contextlib.contextmanager
+def _delta_lock(path):
+    """Held while appending to the delta log and while compact() folds it in,
+    so an append can't land between reading the log and removing it."""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _append_delta(path, record):
+    with _delta_lock(path), open(delta_path(path), "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+def append_role(path, role, skills):
+    """Add or replace a role without rebuilding the base file."""
+    _append_delta(path, {"op": "role", "role": role, "skills": list(skills)})
+
+def append_skill(path, skill):
+    """Add a vocabulary entry (e.g. a new alias target) without rebuilding."""
+    _append_delta(path, {"op": "skill", "skill": skill})
+
+# ---------------------------
+# Reading
+# ---------------------------
+class _StringTable:
+    """Read-only sequence of strings over (offsets, blob) memoryviews."""
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def raw(self, i):
+        return bytes(self._blob[self._offsets[i]:self._offsets[i + 1]])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.raw(i).decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def find(self, raw):
+        """Index of ``raw`` (UTF-8 bytes) in this sorted table, or None."""
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.raw(mid) < raw:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self) and self.raw(lo) == raw else None
+
+class Taxonomy:
+    """Memory-mapped taxonomy plus the overlay of its delta log.
+
+    Skill ids are positions in the sorted base string table; skills added by
+    deltas get ids after the base ones. ``vocabulary`` lists every skill in
+    sorted order, as build_skill_vocabulary does.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._file = open(self.path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        mv = memoryview(self._mm)
+        magic, fmt, order, self.n_base_skills, self.n_base_roles, _ = _HEADER.unpack_from(mv, 0)
+        if magic != MAGIC or fmt != FORMAT:
+            raise ValueError(f"{self.path} is not a format-{FORMAT} taxonomy file")
+        if order != (0 if sys.byteorder == "little" else 1):
+            raise ValueError(f"{self.path} was built on a machine with a different byte order")
+        table = _TABLE.unpack_from(mv, _HEADER.size)
+        sec = {}
+        self._views = [mv]
+        for i, name in enumerate(_SECTIONS):
+            off, length = table[2 * i], table[2 * i + 1]
+            sec[name] = mv[off:off + length]
+            self._views.append(sec[name])
+
+        def cast(name, code):
+            view = sec[name].cast(code)
+            self._views.append(view)
+            return view
+
+        self._skills = _StringTable(cast("skill_offsets", "Q"), sec["skill_blob"])
+        self._lower_order = cast("lower_order", "I")
+        self._lower = _StringTable(cast("lower_offsets", "Q"), sec["lower_blob"])
+        self._counts = cast("skill_counts", "I")
+        self._roles = _StringTable(cast("role_offsets", "Q"), sec["role_blob"])
+        self._role_lower_order = cast("role_lower_order", "I")
+        self._indptr = cast("role_indptr", "I")
+        self._indices = cast("role_indices", "I")
+        self._role_indices_raw = sec["role_indices"]
+        self._load_deltas()
+
+    def _load_deltas(self):
+        self.extra_skills = []           # skills added by deltas, not in the base table
+        self._extra_ids = {}
+        self._extra_lower = {}           # lowercase form -> extra skills with it
+        self.role_overrides = {}         # role.lower() -> (role, [skills]) from deltas
+        self._count_delta = {}
+        dp = delta_path(self.path)
+        self.delta_signature = None
+        if not os.path.exists(dp):
+            return
+        st = os.stat(dp)
+        self.delta_signature = (st.st_mtime_ns, st.st_size)
+        with open(dp, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn last line of an interrupted append
+                if rec.get("op") == "skill":
+                    self._add_skill(rec["skill"])
+                elif rec.get("op") == "role":
+                    self._set_role(rec["role"], [s.strip() for s in rec["skills"]])
+
+    def _add_skill(self, skill):
+        if skill and self.skill_id(skill) is None:
+            self._extra_ids[skill] = self.n_base_skills + len(self.extra_skills)
+            self.extra_skills.append(skill)
+            self._extra_lower.setdefault(skill.lower(), []).append(skill)
+
+    def _set_role(self, role, skills):
+        old = self.required_skills(role)
+        if old is not None:
+            for s in old[1]:
+                self._count_delta[s] = self._count_delta.get(s, 0) - 1
+        for s in skills:
+            self._count_delta[s] = self._count_delta.get(s, 0) + 1
+            self._add_skill(s)
+        self.role_overrides[role.lower()] = (old[0] if old else role, skills)
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # numpy arrays still point into the map; it goes away with them
+        self._file.close()
+
+    # --- skills ---
+    def skill_id(self, skill):
+        i = self._skills.find(skill.encode("utf-8"))
+        return i if i is not None else self._extra_ids.get(skill)
+
+    def skill(self, i):
+        return self._skills[i] if i < self.n_base_skills else self.extra_skills[i - self.n_base_skills]
+
+    def lower_spellings(self, key):
+        """Every skill whose lowercase form is ``key``, in sorted order (may be empty)."""
+        raw = key.encode("utf-8")
+        spellings = []
+        pos = self._lower.find(raw)  # the first of them: the index is sorted by (lower, id)
+        if pos is not None:
+            while pos < len(self._lower) and self._lower.raw(pos) == raw:
+                spellings.append(self._skills[self._lower_order[pos]])
+                pos += 1
+        extra = self._extra_lower.get(key)
+        return sorted(spellings + extra) if extra else spellings
+
+    def lookup_lower(self, text):
+        """Canonical skill for a lowercase form: the first in sorted order, or None."""
+        spellings = self.lower_spellings(text.lower())
+        return spellings[0] if spellings else None
+
+    def skill_count(self, skill):
+        i = self._skills.find(skill.encode("utf-8"))
+        base = self._counts[i] if i is not None else 0
+        return base + self._count_delta.get(skill, 0)
+
+    @property
+    def vocabulary(self):
+        if not self.extra_skills:
+            return self._skills  # lazy view straight over the mmap
+        return sorted(list(self._skills) + self.extra_skills)
+
+    def __len__(self):
+        return self.n_base_skills + len(self.extra_skills)
+
+    # --- roles ---
+    def _base_role_index(self, role):
+        raw = role.lower().encode("utf-8")
+        key = lambda pos: self._roles[self._role_lower_order[pos]].lower().encode("utf-8")
+        lo, hi = 0, self.n_base_roles
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if key(mid) < raw:
+                lo = mid + 1
+            else:
+                hi = mid
+        return self._role_lower_order[lo] if lo < self.n_base_roles and key(lo) == raw else None
+
+    def _base_role_skills(self, r):
+        return [self.skill(i) if i != 0xFFFFFFFF else "" for i in self._indices[self._indptr[r]:self._indptr[r + 1]]]
+
+    def required_skills(self, role):
+        """(role, required skills) for a case-insensitive role name, or None."""
+        override = self.role_overrides.get(role.lower())
+        if override is not None:
+            return override
+        r = self._base_role_index(role)
+        return (self._roles[r], self._base_role_skills(r)) if r is not None else None
+
+    @property
+    def roles(self):
+        names = list(self._roles)
+        base = {n.lower() for n in names}
+        return names + [r for key, (r, _) in self.role_overrides.items() if key not in base]
+
+    def iter_roles(self):
+        """(role, required skills) for every role, deltas applied."""
+        seen = set()
+        for r in range(self.n_base_roles):
+            name = self._roles[r]
+            seen.add(name.lower())
+            yield self.required_skills(name)
+        for key, entry in self.role_overrides.items():
+            if key not in seen:
+                yield entry
+
+# ---------------------------
+# Catalog adapter: compare_to_role / best_fit_roles straight over the mmap
+# ---------------------------
+class _CountsView:
+    def __init__(self, taxonomy):
+        self._tax = taxonomy
+
+    def get(self, skill, default=0):
+        n = self._tax.skill_count(skill)
+        return n if n else default
+
+class _SkillIdView:
+    def __init__(self, taxonomy):
+        self._tax = taxonomy
+
+    def __contains__(self, skill):
+        return self._tax.skill_id(skill) is not None
+
+    def __getitem__(self, skill):
+        i = self._tax.skill_id(skill)
+        if i is None:
+            raise KeyError(skill)
+        return i
+
+    def __len__(self):
+        return len(self._tax)
+
+class TaxonomyCatalog:
+    """Quacks like SkillCatalog (roles, required_skills, skill_counts,
+    vocabulary, matcher, role_matrix) but reads from a mapped Taxonomy."""
+
+    def __init__(self, path):
+        self.taxonomy = Taxonomy(path)
+        st = os.stat(path)
+        self.signature = (st.st_mtime_ns, st.st_size, self.taxonomy.delta_signature)
+        self._file_version = f"tax-{st.st_mtime_ns:x}-{st.st_size:x}-{self.taxonomy.delta_signature or ''}"
+        self.resources = {}
+        self.aliases = {}  # assign a SkillCatalog-style alias table to use one
+        self.skill_counts = _CountsView(self.taxonomy)
+        self._role_matrix = None
+        self._vocabulary = None
+        self._matcher = None
+
+    @property
+    def version(self):
+        if not self.aliases:
+            return self._file_version
+        return f"{self._file_version}-{hashlib.sha256(_alias_key(self.aliases).encode('utf-8')).hexdigest()[:8]}"
+
+    @property
+    def roles(self):
+        return self.taxonomy.roles
+
+    @property
+    def vocabulary(self):
+        if self._vocabulary is None:
+            self._vocabulary = self.taxonomy.vocabulary
+        return self._vocabulary
+
+    @property
+    def matcher(self):
+        if self._matcher is None or self._matcher.alias_key != _alias_key(self.aliases):
+            # an ordinary in-memory matcher: its automaton and fuzzy indexes are
+            # built in each process, only the tables above are shared through the map
+            self._matcher = SkillMatcher(self.vocabulary, self.aliases)
+        return self._matcher
+
+    def required_skills(self, role_name):
+        return self.taxonomy.required_skills(role_name)
+
+    @property
+    def role_matrix(self):
+        if self._role_matrix is None:
+            self._role_matrix = _taxonomy_matrix(self.taxonomy)
+        return self._role_matrix
+
+    def is_stale(self):
+        tax = self.taxonomy
+        try:
+            st = os.stat(tax.path)
+        except OSError:
+            return True
+        dp = delta_path(tax.path)
+        delta = None
+        if os.path.exists(dp):
+            dst = os.stat(dp)
+            delta = (dst.st_mtime_ns, dst.st_size)
+        return (st.st_mtime_ns, st.st_size, delta) != self.signature
+
+def _taxonomy_matrix(tax):
+    """RoleSkillMatrix whose skill-id column is read zero-copy from the mmap
+    (when no delta changes roles)."""
+    import numpy as np
+    matrix = RoleSkillMatrix.__new__(RoleSkillMatrix)
+    matrix.skill_ids = _SkillIdView(tax)
+    n_skills = len(tax)
+    if tax.role_overrides:
+        rows, cols, matrix.roles = [], [], []
+        for r, (role, skills) in enumerate(tax.iter_roles()):
+            matrix.roles.append(role)
+            for s in skills:
+                i = tax.skill_id(s)
+                if i is not None:
+                    rows.append(r)
+                    cols.append(i)
+        matrix.entry_role = np.asarray(rows, dtype=np.int64)
+        matrix.entry_skill = np.asarray(cols, dtype=np.int64)
+    else:
+        matrix.roles = list(tax._roles)
+        indptr = np.frombuffer(tax._indptr, dtype=np.uint32)
+        indices = np.frombuffer(tax._role_indices_raw, dtype=np.uint32)
+        entry_role = np.repeat(np.arange(len(matrix.roles)), np.diff(indptr))
+        keep = indices != 0xFFFFFFFF
+        matrix.entry_role = entry_role if keep.all() else entry_role[keep]
+        matrix.entry_skill = indices if keep.all() else indices[keep]
+    counts = np.frombuffer(tax._counts, dtype=np.uint32).astype(np.float64)
+    if n_skills > len(counts) or tax._count_delta:
+        counts = np.concatenate([counts, np.zeros(n_skills - len(counts))])
+        for s, d in tax._count_delta.items():
+            i = tax.skill_id(s)
+            if i is not None:
+                counts[i] += d
+    matrix.skill_weight = 1.0 / np.maximum(counts, 1.0)
+    n_roles = len(matrix.roles)
+    matrix.role_size = np.bincount(matrix.entry_role, minlength=n_roles).astype(np.float64)
+    matrix.role_weight = np.bincount(matrix.entry_role, weights=matrix.skill_weight[matrix.entry_skill],
+                                     minlength=n_roles)
+    return matrix
+
+_TAXONOMIES = {}
+_TAXONOMIES_LOCK = threading.Lock()
+
+def get_taxonomy_catalog(path, resources_json=None, aliases_json=None):
+    """Shared TaxonomyCatalog for ``path``, with the resources and aliases from
+    those files if given, reopened when the file or its delta log changes."""
+    key = tuple(os.path.abspath(str(p)) if p else None for p in (path, resources_json, aliases_json))
+    with _TAXONOMIES_LOCK:
+        catalog = _TAXONOMIES.get(key)
+        if catalog is None or catalog.is_stale():
+            catalog = TaxonomyCatalog(path)
+            if resources_json:
+                catalog.resources = _load_resources(resources_json)
+            if aliases_json:
+                catalog.aliases = _load_aliases(aliases_json)
+            _TAXONOMIES[key] = catalog
+        return catalog
+
+def open_catalog(job_skills_csv="job_skills.csv", resources_json="resources.json",
+                 aliases_json="aliases.json", taxonomy=None):
+    """Catalog for a command-line tool: over the ``taxonomy`` file when one is
+    given (job_skills_csv is then unused), else the shared SkillCatalog."""
+    if taxonomy:
+        return get_taxonomy_catalog(taxonomy, resources_json, aliases_json)
+    return get_catalog(job_skills_csv, resources_json, aliases_json)
+
+def compact(path):
+    """Fold the delta log into a fresh base file and remove the log. Appends
+    wait until it is done."""
+    with _delta_lock(path):
+        tax = Taxonomy(path)
+        try:
+            roles = list(tax.iter_roles())
+            extra = list(tax.vocabulary)
+        finally:
+            tax.close()
+        write_taxonomy(path, roles, extra)
+        dp = delta_path(path)
+        if os.path.exists(dp):
+            os.remove(dp)
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and update memory-mapped skill taxonomies.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="compile a role CSV (+ resources.json) into a taxonomy file")
+    b.add_argument("--job-skills", default="job_skills.csv")
+    b.add_argument("--resources", default="resources.json")
+    b.add_argument("-o", "--output", default="skills.tax")
+    r = sub.add_parser("add-role", help="append a role (replaces an existing one with the same name)")
+    r.add_argument("path")
+    r.add_argument("role")
+    r.add_argument("skills", help="comma/semicolon separated")
+    s = sub.add_parser("add-skill", help="append a vocabulary entry")
+    s.add_argument("path")
+    s.add_argument("skill")
+    c = sub.add_parser("compact", help="fold the delta log into the base file")
+    c.add_argument("path")
+    i = sub.add_parser("info")
+    i.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "build":
+        build_taxonomy(args.output, args.job_skills, args.resources)
+        args.path = args.output
+    elif args.cmd == "add-role":
+        append_role(args.path, args.role, [x for x in _split_skills(args.skills) if x])
+    elif args.cmd == "add-skill":
+        append_skill(args.path, args.skill.strip())
+    elif args.cmd == "compact":
+        compact(args.path)
+    tax = Taxonomy(args.path)
+    print(json.dumps({"path": args.path, "bytes": os.path.getsize(args.path), "skills": len(tax),
+                      "roles": len(tax.roles), "delta_skills": len(tax.extra_skills),
+                      "delta_roles": len(tax.role_overrides)}))
+    tax.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
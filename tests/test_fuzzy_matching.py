@@ -0,0 +1,59 @@
+# SkillMatcher.fuzzy prunes candidates by length and shared bigrams before
+# scoring; it must still give exactly difflib.get_close_matches' answer.
+import os
+import random
+from difflib import get_close_matches
+
+import pytest
+
+from skill_extractor import SkillMatcher, get_catalog
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CUTOFFS = [0.0, 0.3, 0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 1.0]
+
+def _expected(word, keys, cutoff):
+    found = get_close_matches(word, keys, n=1, cutoff=cutoff)
+    return found[0] if found else None
+
+def _mutate(rng, word, alphabet):
+    chars = list(word)
+    for _ in range(rng.randint(0, 3)):
+        op = rng.random()
+        pos = rng.randint(0, len(chars))
+        if op < 0.4:
+            chars.insert(pos, rng.choice(alphabet))
+        elif chars and op < 0.7:
+            del chars[min(pos, len(chars) - 1)]
+        elif chars:
+            chars[min(pos, len(chars) - 1)] = rng.choice(alphabet)
+    return "".join(chars) or rng.choice(alphabet)
+
+def test_fuzzy_matches_difflib_on_bundled_vocabulary():
+    rng = random.Random(2024)
+    catalog = get_catalog(*(os.path.join(ROOT, f) for f in ("job_skills.csv", "resources.json", "aliases.json")))
+    matcher = SkillMatcher(catalog.vocabulary)
+    keys = list(matcher.by_lower)
+    alphabet = "abcdefghijklmnopqrstuvwxyz0123456789 +#.-/"
+    for _ in range(1500):
+        word = _mutate(rng, rng.choice(keys), alphabet)
+        cutoff = rng.choice(CUTOFFS)
+        assert matcher.fuzzy(word, cutoff) == _expected(word, keys, cutoff), (word, cutoff)
+
+@pytest.mark.parametrize("seed", range(4))
+def test_fuzzy_matches_difflib_on_synthetic_vocabulary(seed):
+    # short keys over a tiny alphabet with the separators skill names use, so
+    # lengths, shared bigrams and score ties all collide often
+    rng = random.Random(seed)
+    alphabet = "abcde +#.-"
+    for _ in range(500):
+        vocab = sorted({"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 10)))
+                        for _ in range(rng.randint(1, 30))})
+        matcher = SkillMatcher(vocab)
+        keys = list(matcher.by_lower)
+        word = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 12)))
+        cutoff = rng.choice(CUTOFFS)
+        assert matcher.fuzzy(word, cutoff) == _expected(word, keys, cutoff), (vocab, word, cutoff)
+
+def test_fuzzy_rejects_cutoff_out_of_range():
+    with pytest.raises(ValueError):
+        SkillMatcher(["Python"]).fuzzy("pythn", 1.5)
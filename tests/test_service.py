@@ -0,0 +1,57 @@
+# SkillService.handle driven directly (no HTTP), plus the request framing
+# checks of the HTTP handler against a server on a free port.
+import base64
+import os
+import socket
+import threading
+
+import pytest
+
+from service import SkillService, make_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(scope="module")
+def service():
+    svc = SkillService(os.path.join(ROOT, "job_skills.csv"), os.path.join(ROOT, "resources.json"), pdf_workers=1)
+    yield svc
+    svc.close()
+
+def test_analyze_text(service):
+    status, payload = service.handle("POST", "/analyze", {"text": "Python, SQL and Pandas", "role": "Data Scientist"})
+    assert status == 200
+    assert {"Python", "SQL", "Pandas"} <= set(payload["skills"])
+
+def test_health(service):
+    status, payload = service.handle("GET", "/health")
+    assert status == 200
+
+@pytest.mark.parametrize("body", [
+    {"text": "Python"},                                   # no role
+    {"role": "Data Scientist"},                           # no input
+    {"role": "Data Scientist", "pdf_base64": "not base64!"},
+])
+def test_bad_request(service, body):
+    status, payload = service.handle("POST", "/analyze", body)
+    assert status == 400 and payload["error"]
+
+def test_unknown_route(service):
+    assert service.handle("POST", "/nope", {})[0] == 404
+    assert service.handle("GET", "/analyze")[0] == 404
+
+def test_unreadable_pdf(service):
+    body = {"role": "Data Scientist", "pdf_base64": base64.b64encode(b"%PDF-1.4 not really a pdf").decode()}
+    status, payload = service.handle("POST", "/analyze", body)
+    assert status == 422 and "could not read PDF" in payload["error"]
+
+@pytest.mark.parametrize("length", ["-1", "abc"])
+def test_bad_content_length(service, length):
+    server = make_server(port=0, service=service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with socket.create_connection(server.server_address, timeout=5) as conn:
+            conn.sendall(f"POST /analyze HTTP/1.1\r\nHost: x\r\nContent-Length: {length}\r\n\r\n{{}}".encode())
+            assert conn.recv(4096).startswith(b"HTTP/1.1 400")
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,88 @@
+# visuals.py — cached, off-thread rendering of the skills word cloud
+import contextvars
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from instrumentation import span
+
+def render_wordcloud_png(skills, width=800, height=400):
+    """PNG bytes of a word cloud for ``skills``.
+
+    Rendered straight to an image (no matplotlib figure), with a fixed seed so
+    the same skills always give the same picture.
+    """
+    from wordcloud import WordCloud
+    with span("wordcloud_render"):
+        wc = WordCloud(width=width, height=height, background_color='white', random_state=42)
+        wc.generate(" ".join(skills))
+        image = wc.to_image()
+        buf = io.BytesIO()
+        image.save(buf, format="PNG")
+        image.close()
+        return buf.getvalue()
+
+class WordCloudRenderer:
+    """LRU cache of rendered word clouds keyed by (skills, width, height), filled
+    by a background thread. Concurrent requests for the same key share one render."""
+
+    def __init__(self, max_entries=32, workers=1):
+        self.max_entries = max_entries
+        self._images = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wordcloud")
+        self.hits = self.misses = 0
+
+    def submit(self, skills, width=800, height=400):
+        """Future resolving to PNG bytes; already resolved on a cache hit."""
+        key = (tuple(skills), width, height)
+        with self._lock:
+            png = self._images.get(key)
+            if png is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                done = Future()
+                done.set_result(png)
+                return done
+            fut = self._pending.get(key)
+            if fut is None:
+                self.misses += 1
+                # run in the caller's context so timing spans land in its trace
+                ctx = contextvars.copy_context()
+                fut = self._pool.submit(ctx.run, render_wordcloud_png, key[0], width, height)
+                self._pending[key] = fut
+                fresh = True
+            else:
+                fresh = False
+        if fresh:
+            # outside the lock: a future that has already finished runs the
+            # callback right here, and _store takes the lock itself
+            fut.add_done_callback(lambda f, key=key: self._store(key, f))
+        return fut
+
+    def _store(self, key, fut):
+        with self._lock:
+            self._pending.pop(key, None)
+            if fut.exception() is not None:
+                return
+            self._images[key] = fut.result()
+            self._images.move_to_end(key)
+            while len(self._images) > self.max_entries:
+                self._images.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._images),
+                    "pending": len(self._pending)}
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+def get_wordcloud_renderer():
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = WordCloudRenderer()
+        return _renderer